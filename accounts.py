@@ -0,0 +1,248 @@
+import os
+import re
+import html
+from datetime import datetime
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+from config_manager import ConfigManager, ConfigReader, to_bool
+from report_generator import ReportGenerator
+from upload_queue import UploadQueue
+
+# 多账号汇总页文件名（本地与报告放在同一目录，上传到仓库根目录）
+INDEX_FILE_NAME = "baah_task_index.html"
+
+# 账号名会用作目录名，不能包含路径分隔符等字符
+INVALID_NAME_PATTERN = re.compile(r'[\\/:*?"<>|]')
+
+
+class AccountConfig(ConfigReader):
+    """单个账号的配置视图
+
+    与 ConfigManager 的读取方式相同（get('a.b')），账号设置中的同名配置覆盖全局配置；
+    资源文件夹、报告路径和SQLite数据库按账号名分区：
+        资源文件夹: <resources_folder>/<账号名>
+        报告: <html_output所在目录>/<账号名>/<报告文件名>
+        数据库: <sqlite_file所在目录>/<账号名>/<数据库文件名>
+    """
+
+    def __init__(self, settings):
+        self.base = ConfigManager()
+        self.settings = settings
+        self.name = settings['name']
+        self.partition_paths = self._build_partition_paths()
+
+    def _build_partition_paths(self):
+        """生成按账号分区的路径"""
+        resources_folder = self.base.get('file_paths.resources_folder')
+        html_output = self.base.get('file_paths.html_output')
+        sqlite_file = self.base.get('storage.sqlite_file')
+        if not sqlite_file:
+            sqlite_file = os.path.join(os.path.dirname(os.path.normpath(resources_folder)), 'resources.db')
+
+        return {
+            'file_paths.resources_folder': os.path.join(resources_folder, self.name),
+            'file_paths.html_output': os.path.join(os.path.dirname(html_output), self.name,
+                                                   os.path.basename(html_output)),
+            'storage.sqlite_file': os.path.join(os.path.dirname(sqlite_file), self.name,
+                                                os.path.basename(sqlite_file))
+        }
+
+    def get(self, key, default=None):
+        """获取配置值：账号设置 > 账号分区路径 > 全局配置"""
+        value = self.settings
+        for k in key.split('.'):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                break
+        else:
+            return value
+
+        if key in self.partition_paths:
+            return self.partition_paths[key]
+        return self.base.get(key, default)
+
+    def set(self, key, value):
+        """设置配置值（写入全局配置，仅在内存中）"""
+        self.base.set(key, value)
+
+    def save(self):
+        """保存全局配置到文件"""
+        return self.base.save()
+
+    def matches_subject(self, subject):
+        """邮件主题是否属于该账号（未设置 subject_keyword 时不区分）"""
+        keyword = self.settings.get('subject_keyword')
+        return not keyword or keyword in subject
+
+
+def get_accounts():
+    """获取启用的账号列表，未配置 accounts 时返回空列表（单账号模式）"""
+    accounts = []
+    names = set()
+    for settings in ConfigManager().get('accounts') or []:
+        if not isinstance(settings, dict) or not settings.get('name'):
+            print(f"账号配置缺少名称，跳过: {settings}")
+            continue
+
+        if not to_bool(settings.get('enabled', True)):
+            continue
+
+        name = str(settings['name']).strip()
+        if INVALID_NAME_PATTERN.search(name) or name in ('.', '..'):
+            print(f"账号名 {name} 不能用作目录名，跳过")
+            continue
+        if name in names:
+            print(f"账号名 {name} 重复，跳过")
+            continue
+
+        names.add(name)
+        accounts.append(AccountConfig({**settings, 'name': name}))
+    return accounts
+
+
+def generate_account_report(settings, force=False):
+    """在子进程中生成单个账号的报告（进程池的任务函数，必须定义在模块顶层）
+
+    返回 {'name', 'html_file', 'summary', 'fingerprint', 'skipped'}：
+    生成失败或数据未变化时 html_file 为 None，数据未变化时 skipped 为True，summary 为上次发布时的统计
+    """
+    return run_account_generator(ReportGenerator(AccountConfig(settings)), force)
+
+
+def run_account_generator(generator, force=False):
+    """用账号的报告生成器生成报告，返回结果格式与 generate_account_report 相同
+
+    常驻的报告进程为每个账号保留一个生成器，已解析的每日数据留在内存中
+    """
+    account = generator.account
+    result = {'name': account.name, 'html_file': None, 'summary': None, 'fingerprint': None, 'skipped': False}
+    try:
+        result['html_file'] = generator.process_baah_data(force)
+        result['fingerprint'] = generator.last_fingerprint
+        result['summary'] = generator.last_summary
+        
+        if result['html_file'] is None and generator.last_fingerprint:
+            published = generator.get_published_state()
+            if published and published.get('fingerprint') == generator.last_fingerprint:
+                result['skipped'] = True
+                result['summary'] = published.get('summary')
+    except Exception as e:
+        print(f"生成账号 {account.name} 的报告失败: {e}")
+    return result
+
+
+class MultiAccountReporter:
+    """多账号报告生成
+
+    各账号的报告在进程池中并行生成（统计和渲染都是CPU密集型，多进程不受GIL限制），
+    全部完成后生成汇总页，再将各账号的报告和汇总页加入上传队列。
+    """
+
+    def __init__(self, accounts):
+        self.config = ConfigManager()
+        self.accounts = accounts
+
+    def get_max_workers(self):
+        """并行生成报告的进程数（report.max_workers 为0时按账号数和CPU核数自动确定）"""
+        try:
+            max_workers = int(self.config.get('report.max_workers', 0) or 0)
+        except (TypeError, ValueError):
+            max_workers = 0
+        if max_workers <= 0:
+            max_workers = os.cpu_count() or 1
+        return max(1, min(max_workers, len(self.accounts)))
+
+    def generate_reports(self, force=False):
+        """生成所有账号的报告，返回结果列表（与账号顺序一致）"""
+        settings_list = [account.settings for account in self.accounts]
+        max_workers = self.get_max_workers()
+        if max_workers > 1:
+            print(f"使用 {max_workers} 个进程并行生成 {len(settings_list)} 个账号的报告")
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    return list(executor.map(generate_account_report, settings_list,
+                                             [force] * len(settings_list)))
+            except Exception as e:
+                print(f"并行生成报告失败，改为依次生成: {e}")
+
+        return [generate_account_report(settings, force) for settings in settings_list]
+
+    def get_index_path(self):
+        """汇总页路径（与各账号报告目录同级）"""
+        return os.path.join(os.path.dirname(self.config.get('file_paths.html_output')), INDEX_FILE_NAME)
+
+    def iter_account_rows(self, results):
+        """逐行生成汇总页的账号表格行HTML"""
+        for result in results:
+            name = html.escape(result['name'])
+            summary = result['summary']
+            if summary:
+                # 与上传到仓库后的位置一致：<账号名>/baah_task_report.html
+                link = f"{quote(result['name'])}/baah_task_report.html"
+                net_class = '' if summary['total_net_diamond_gain'] >= 0 else ' class="ba-negative"'
+                yield f"""
+                <tr>
+                    <td>{name}</td>
+                    <td>{summary['total_days']}</td>
+                    <td>{summary['current_total_draws']:,}</td>
+                    <td{net_class}>{summary['total_net_diamond_gain']:,}</td>
+                    <td><a href="{link}">查看报告</a></td>
+                </tr>"""
+            else:
+                yield f"""
+                <tr>
+                    <td>{name}</td>
+                    <td colspan="4">暂无数据</td>
+                </tr>"""
+
+    def write_index(self, results):
+        """生成多账号汇总页，先写临时文件再替换"""
+        index_path = self.get_index_path()
+        template_path = os.path.join(os.path.dirname(__file__), 'templates', 'accounts_index_template.html')
+        temp_path = index_path + '.tmp'
+        try:
+            template = ReportGenerator().load_report_template(template_path)
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                template.render_to(f, {
+                    'CURRENT_TIME': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'ACCOUNT_ROWS': lambda: self.iter_account_rows(results)
+                })
+            os.replace(temp_path, index_path)
+        except Exception as e:
+            print(f"生成汇总页失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        print(f"汇总页已生成: {index_path}")
+        return index_path
+
+    def upload(self, results, index_path):
+        """将各账号新生成的报告（仓库中按账号名分目录）和汇总页加入上传队列，上传成功后记录发布状态"""
+        for account, result in zip(self.accounts, results):
+            if result['html_file']:
+                generator = ReportGenerator(account)
+                generator.last_fingerprint = result['fingerprint']
+                generator.last_summary = result['summary']
+                generator.publish_report(result['html_file'])
+        if index_path and self.config.get_bool('gitee.enabled', True):
+            UploadQueue().enqueue([(index_path, INDEX_FILE_NAME)], report_key=index_path)
+    
+    def is_up_to_date(self):
+        """所有账号的报告都与最近一次发布时相同"""
+        return all(ReportGenerator(account).is_up_to_date() for account in self.accounts)
+
+    def run(self, force=False):
+        """生成并上传所有账号的报告，返回汇总页路径（所有账号数据都未变化时返回None）"""
+        return self.publish(self.generate_reports(force))
+
+    def publish(self, results):
+        """根据各账号的生成结果生成汇总页并加入上传队列，返回汇总页路径（没有新生成的报告时返回None）"""
+        if not any(result['html_file'] for result in results):
+            print("所有账号的报告均无需更新")
+            return None
+
+        index_path = self.write_index(results)
+        self.upload(results, index_path)
+        return index_path
@@ -4,13 +4,21 @@ import time
 import argparse
 import subprocess
 import threading
+import multiprocessing
 import webbrowser
 from config_manager import ConfigManager
 from check_module import CheckModule
 from process_monitor import ProcessMonitor
 from email_processor import EmailProcessor
+from email_backfill import EmailBackfill
 from success_writer import SuccessWriter
 from report_generator import ReportGenerator
+from resource_store import ResourceStore
+from resource_archive import ResourceArchive
+from accounts import get_accounts, MultiAccountReporter
+from upload_queue import UploadQueue
+from resource_loader import get_max_workers
+from report_daemon import ReportDaemon
 from system_operations import SystemOperations
 
 # 版本信息
@@ -20,6 +28,7 @@ VERSION_FILE = "version.txt"
 class BAAHManager:
     def __init__(self):
         self.config = ConfigManager()
+        self.upload_threads = []
     
     def run_check(self):
         """运行检查任务"""
@@ -27,15 +36,21 @@ class BAAHManager:
         print("运行检查任务...")
         print("=" * 50)
         
+        # 上次运行未完成的上传（如上传中途关机）在后台继续
+        self.start_upload_worker()
+        
         checker = CheckModule()
         checker.check_and_execute()
     
-    def run_monitor(self, only=False):
+    def run_monitor(self, only=False, force=False):
         """运行监控任务"""
         print("=" * 50)
         print("运行监控任务...")
         print("=" * 50)
         
+        # 上次运行未完成的上传在后台继续
+        self.start_upload_worker()
+        
         monitor = ProcessMonitor()
         try:
             # 启动监控，当监控到任务完成后会返回True
@@ -50,8 +65,7 @@ class BAAHManager:
                     print("步骤1: 运行数据获取任务...")
                     print("=" * 50)
                     
-                    email_processor = EmailProcessor()
-                    found_success_email = email_processor.process_baah_email()
+                    found_success_email = self.fetch_emails()
                     
                     if found_success_email:
                         # 步骤2: 运行报告生成任务
@@ -59,7 +73,7 @@ class BAAHManager:
                         print("步骤2: 运行报告生成任务...")
                         print("=" * 50)
                         
-                        self.run_send()
+                        self.run_send(force)
                         
                         # 步骤3: 写入success状态
                         print("\n" + "=" * 50)
@@ -97,30 +111,32 @@ class BAAHManager:
             print("\n监控程序被用户中断")
             monitor.stop()
     
-    def run_getdata(self, only=False, date=None):
-        """运行数据获取任务"""
+    def run_getdata(self, only=False, date=None, force=False, from_date=None, to_date=None):
+        """运行数据获取任务（指定 from_date/to_date 时补全该日期范围内缺少的资源数据）"""
         print("=" * 50)
         print("运行数据获取任务...")
         print("=" * 50)
         
-        email_processor = EmailProcessor()
-        found_success_email = email_processor.process_baah_email(date)
+        if from_date or to_date:
+            self.run_backfill(from_date, to_date, only, force)
+            return
+        
+        found_success_email = self.fetch_emails(date)
         
         if found_success_email:
             if not only:
-                # 等待后运行send任务
-                wait_time = self.config.get('timing.send_wait_time', 20)
-                print(f"等待{wait_time}秒运行报告生成...")
-                time.sleep(int(wait_time))
-                
-                # 生成报告
-                print("运行报告生成...")
-                report_generator = ReportGenerator()
-                html_file = report_generator.process_baah_data()
-                
-                if html_file:
-                    # 上传到Gitee
-                    report_generator.upload_to_gitee(html_file)
+                if not force and self.reports_up_to_date():
+                    # 重复获取到相同的数据时不再等待和生成报告
+                    print("资源数据未变化，报告已是最新，跳过报告生成")
+                else:
+                    # 等待后运行send任务
+                    wait_time = self.config.get('timing.send_wait_time', 20)
+                    print(f"等待{wait_time}秒运行报告生成...")
+                    time.sleep(int(wait_time))
+                    
+                    # 生成报告并上传到Gitee
+                    print("运行报告生成...")
+                    self.generate_reports(force)
                 
                 # 写入success
                 print("写入success状态...")
@@ -145,17 +161,162 @@ class BAAHManager:
                 except Exception as e:
                     print(f"启动BAAH计划任务失败: {e}")
     
-    def run_send(self):
+    def fetch_emails(self, date=None):
+        """获取BAAH结束邮件并保存资源数据（配置了多账号时逐个账号处理），任一账号成功即返回True"""
+        accounts = get_accounts()
+        if not accounts:
+            email_processor = EmailProcessor()
+            return email_processor.process_baah_email(date)
+        
+        found_success_email = False
+        for account in accounts:
+            print(f"\n处理账号: {account.name}")
+            email_processor = EmailProcessor(account)
+            if email_processor.process_baah_email(date):
+                found_success_email = True
+        return found_success_email
+    
+    def run_backfill(self, from_date, to_date, only=False, force=False):
+        """补全日期范围内缺少的资源数据，保存了新数据时生成报告（不写入success、不执行完成操作）"""
+        if not from_date:
+            print("补全历史数据需要指定开始日期: -getdata --from YYMMDD [--to YYMMDD]")
+            return
+        date_range = EmailBackfill.parse_range(from_date, to_date)
+        if not date_range:
+            return
+        start, end = date_range
+        
+        saved = 0
+        accounts = get_accounts()
+        for account in accounts or [None]:
+            if account is not None:
+                print(f"\n处理账号: {account.name}")
+            saved += EmailBackfill(account).run(start, end)
+        
+        if not saved:
+            return
+        if only:
+            print("--only模式: 仅执行数据获取任务，跳过后续操作")
+            return
+        print("运行报告生成...")
+        self.generate_reports(force)
+    
+    def reports_up_to_date(self):
+        """报告是否已是最新（数据、模板和配置与最近一次成功发布时相同）"""
+        accounts = get_accounts()
+        if accounts:
+            return MultiAccountReporter(accounts).is_up_to_date()
+        return ReportGenerator().is_up_to_date()
+    
+    def generate_reports(self, force=False):
+        """生成报告并加入上传队列（配置了多账号时并行生成各账号的报告和汇总页）
+        
+        数据未变化时跳过生成和上传，force为True时总是重新生成。
+        上传在后台线程中进行，不阻塞后续的写入success和完成操作；
+        上传成功后才记录发布状态，未完成的上传留在队列中，下次运行时继续
+        """
+        accounts = get_accounts()
+        if accounts:
+            reporter = MultiAccountReporter(accounts)
+            reporter.run(force)
+        else:
+            report_generator = ReportGenerator()
+            html_file = report_generator.process_baah_data(force)
+            if html_file:
+                report_generator.publish_report(html_file)
+        
+        self.start_upload_worker()
+    
+    def start_upload_worker(self):
+        """在后台线程中上传队列中的报告"""
+        thread = UploadQueue().start_worker()
+        if thread is not None:
+            self.upload_threads.append(thread)
+        return thread
+    
+    def wait_upload_workers(self):
+        """命令结束前短暂等待后台上传，超时后直接退出，未完成的上传留到下次运行"""
+        return UploadQueue().wait_workers(self.upload_threads)
+    
+    def run_send(self, force=False):
         """运行报告生成任务"""
         print("=" * 50)
         print("运行报告生成任务...")
         print("=" * 50)
         
-        report_generator = ReportGenerator()
-        html_file = report_generator.process_baah_data()
+        self.generate_reports(force)
+    
+    def run_reportd(self):
+        """运行报告常驻进程：资源数据变化后立即重新生成报告"""
+        print("=" * 50)
+        print("运行报告常驻进程...")
+        print("=" * 50)
+        
+        ReportDaemon().run()
+    
+    def run_migrate(self):
+        """将JSON资源文件迁移到SQLite存储"""
+        print("=" * 50)
+        print("运行资源数据迁移任务...")
+        print("=" * 50)
+        
+        # 多账号时每个账号的资源文件夹分别导入该账号的数据库
+        for account_config in get_accounts() or [self.config]:
+            folder_path = account_config.get('file_paths.resources_folder')
+            if not os.path.isdir(folder_path):
+                print(f"资源文件夹不存在，跳过: {folder_path}")
+                continue
+            store = ResourceStore(config=account_config)
+            count = store.migrate_from_json(folder_path)
+            print(f"已从 {folder_path} 导入 {count} 天的资源数据到 {store.db_path}")
+        
+        # 迁移完成后切换到SQLite存储
+        if not ResourceStore.is_enabled(self.config):
+            self.config.set('storage.backend', 'sqlite')
+            if self.config.save():
+                print("已将存储方式切换为SQLite (storage.backend = sqlite)")
+    
+    def run_compact(self):
+        """将已结束月份的每日资源文件合并为月度归档"""
+        print("=" * 50)
+        print("运行资源文件归档任务...")
+        print("=" * 50)
         
-        if html_file:
-            report_generator.upload_to_gitee(html_file)
+        # 多账号时每个账号的资源文件夹分别归档
+        for account_config in get_accounts() or [self.config]:
+            if ResourceStore.is_enabled(account_config):
+                print(f"{account_config.get('file_paths.resources_folder')}: 使用SQLite存储，无需归档")
+                continue
+            folder_path = account_config.get('file_paths.resources_folder')
+            if not os.path.isdir(folder_path):
+                print(f"资源文件夹不存在，跳过: {folder_path}")
+                continue
+            count = ResourceArchive(folder_path).compact()
+            print(f"{folder_path}: 共归档 {count} 个资源文件")
+    
+    def run_reparse(self, only=False, force=False):
+        """不连接邮箱，从邮件正文缓存并行重新生成资源文件，之后生成报告"""
+        print("=" * 50)
+        print("运行资源文件重建任务...")
+        print("=" * 50)
+        
+        saved = 0
+        accounts = get_accounts()
+        for account in accounts or [None]:
+            if account is not None:
+                print(f"\n处理账号: {account.name}")
+            email_processor = EmailProcessor(account)
+            count = email_processor.reparse_cached_messages(get_max_workers(email_processor.config))
+            print(f"已从缓存重新生成 {count} 天的资源数据")
+            saved += count
+        
+        if not saved:
+            return
+        if only:
+            print("--only模式: 仅重新生成资源文件，跳过报告生成")
+            return
+        print("运行报告生成...")
+        self.generate_reports(force)
     
     def run_writesuccess(self):
         """运行写入success任务"""
@@ -174,14 +335,20 @@ class BAAHManager:
         print("用法: baah_manager.exe [参数]")
         print()
         print("参数:")
-        print("  -check       运行检查任务（检查今天是否已做BAAH）")
+        print("  -check       运行检查任务（检查今天是否已做BAAH，并继续上传队列中未完成的报告）")
         print("  -monitor     运行监控任务（监控BAAH和MUMU进程，完成后自动执行后续任务）")
         print("  -getdata     运行数据获取任务（获取邮件数据并处理）")
-        print("  -send        运行报告生成任务（生成HTML报告并上传）")
+        print("  -getdata --from YYMMDD [--to YYMMDD] 补全日期范围内缺少的资源数据（多个邮箱连接并发获取，--to 默认为今天）")
+        print("  -send        运行报告生成任务（生成HTML报告并加入上传队列，在后台上传）")
+        print("  -reportd     运行报告常驻进程（资源数据变化后立即重新生成报告，数据保留在内存中）")
         print("  -writesuccess 写入success状态")
+        print("  -migrate     将JSON资源文件迁移到SQLite存储")
+        print("  -compact     将已结束月份的每日资源文件合并为月度归档（archive/YYYY-MM.jsonl.gz）")
+        print("  -reparse     不连接邮箱，从本地缓存的邮件正文重新生成所有资源文件")
         print("  -preview     预览时间段操作配置")
         print("  -fix         修复配置文件路径")
         print("  -help        显示此帮助信息")
+        print("  --force      数据未变化时也重新生成并上传报告（用于 -send/-getdata/-monitor）")
         print()
         print("注意: -monitor 参数会在监控到任务完成后自动执行 -getdata 和 -send 任务")
         print()
@@ -189,8 +356,14 @@ class BAAHManager:
         print("  baah_manager.exe -check")
         print("  baah_manager.exe -monitor")
         print("  baah_manager.exe -getdata")
+        print("  baah_manager.exe -getdata --from 260101 --to 260131")
         print("  baah_manager.exe -send")
+        print("  baah_manager.exe -send --force")
+        print("  baah_manager.exe -reportd")
         print("  baah_manager.exe -writesuccess")
+        print("  baah_manager.exe -migrate")
+        print("  baah_manager.exe -compact")
+        print("  baah_manager.exe -reparse")
         print("  baah_manager.exe -preview")
         print("  baah_manager.exe -fix")
         print("=" * 50)
@@ -226,7 +399,9 @@ def start_webui():
             'authorization_code': '邮箱授权码',
             'folder': '邮箱文件夹',
             'subject_keyword': '邮件主题关键词',
-            'sender': '发件人'
+            'sender': '发件人',
+            'backfill_connections': '补全数据的邮箱连接数',
+            'message_cache': '缓存邮件正文'
         },
         # 进程名称设置
         'process_names': {
@@ -246,7 +421,39 @@ def start_webui():
             'token': 'Gitee Token',
             'branch': '分支',
             'owner': '仓库拥有者',
-            'file_path': '文件路径'
+            'file_path': '文件路径',
+            'api_base': 'API地址',
+            'connect_timeout': '连接超时(秒)',
+            'read_timeout': '读取超时(秒)',
+            'batch_commit': '多个文件合并为一次提交(true/false)'
+        },
+        # 数据存储设置
+        'storage': {
+            'backend': '存储方式(json/sqlite)',
+            'sqlite_file': 'SQLite数据库文件',
+            'load_workers': '读取资源文件线程数(0为自动)'
+        },
+        # 报告设置
+        'report': {
+            'analytics_backend': '统计引擎(auto/numpy/python)',
+            'data_mode': '数据模式(inline/sidecar)',
+            'sidecar_gzip': '数据文件gzip压缩(true/false)',
+            'minify': '压缩报告页面(true/false)',
+            'strip_sections': '去除的报告区块(weekly,monthly,reduction)',
+            'max_workers': '多账号并行生成进程数(0为自动)'
+        },
+        # 上传队列设置
+        'upload': {
+            'initial_backoff': '首次重试等待(秒)',
+            'max_backoff': '最长重试等待(秒)',
+            'worker_deadline_minutes': '每次运行上传时限(分钟)',
+            'exit_grace_seconds': '退出前等待上传(秒)',
+            'max_age_days': '上传任务保留天数'
+        },
+        # 报告常驻进程设置
+        'report_daemon': {
+            'poll_interval': '扫描间隔(秒)',
+            'settle_seconds': '等待文件写入完成(秒)'
         },
         # 完成操作设置
         'completion': {
@@ -352,6 +559,7 @@ def start_webui():
                     command = data.get('command', '')
                     only = data.get('only', False)
                     date = data.get('date', None)
+                    force = data.get('force', False)
                     
                     # 在新线程中执行命令以避免阻塞
                     def run_command():
@@ -360,11 +568,11 @@ def start_webui():
                             if command == 'check':
                                 baah_manager.run_check()
                             elif command == 'monitor':
-                                baah_manager.run_monitor(only)
+                                baah_manager.run_monitor(only, force)
                             elif command == 'getdata':
-                                baah_manager.run_getdata(only, date)
+                                baah_manager.run_getdata(only, date, force)
                             elif command == 'send':
-                                baah_manager.run_send()
+                                baah_manager.run_send(force)
                             elif command == 'writesuccess':
                                 baah_manager.run_writesuccess()
                         except Exception as e:
@@ -542,13 +750,20 @@ def main():
     parser.add_argument('-monitor', action='store_true', help='运行监控任务')
     parser.add_argument('-getdata', action='store_true', help='运行数据获取任务')
     parser.add_argument('-send', action='store_true', help='运行报告生成任务')
+    parser.add_argument('-reportd', action='store_true', help='运行报告常驻进程')
     parser.add_argument('-writesuccess', action='store_true', help='写入success状态')
+    parser.add_argument('-migrate', action='store_true', help='将JSON资源文件迁移到SQLite存储')
+    parser.add_argument('-compact', action='store_true', help='将已结束月份的资源文件合并为月度归档')
+    parser.add_argument('-reparse', action='store_true', help='从缓存的邮件正文重新生成资源文件')
     parser.add_argument('-preview', action='store_true', help='预览时间段操作配置')
     parser.add_argument('-fix', action='store_true', help='修复配置文件路径')
     parser.add_argument('-help', action='store_true', help='显示帮助信息')
     parser.add_argument('-v', '--version', action='store_true', help='显示版本信息')
     parser.add_argument('--only', action='store_true', help='仅执行指定任务，跳过后续操作')
+    parser.add_argument('--force', action='store_true', help='数据未变化时也重新生成并上传报告')
     parser.add_argument('--date', type=str, help='指定日期（格式：YYMMDD，如260101表示2026年1月1日）')
+    parser.add_argument('--from', dest='from_date', type=str, help='补全数据的开始日期（格式：YYMMDD，用于 -getdata）')
+    parser.add_argument('--to', dest='to_date', type=str, help='补全数据的结束日期（格式：YYMMDD，默认为今天）')
     
     # 如果没有参数，自动启动WebUI
     if len(sys.argv) == 1:
@@ -561,12 +776,18 @@ def main():
         print("  ba.py -monitor     运行监控任务")
         print("  ba.py -getdata     运行数据获取")
         print("  ba.py -getdata YYMMDD 运行数据获取并指定日期")
+        print("  ba.py -getdata --from YYMMDD --to YYMMDD 补全日期范围内缺少的数据")
         print("  ba.py -send        生成报告")
+        print("  ba.py -reportd     报告常驻进程（数据变化后自动生成报告）")
         print("  ba.py -writesuccess 写入成功状态")
+        print("  ba.py -migrate     迁移资源数据到SQLite")
+        print("  ba.py -compact     归档已结束月份的资源文件")
+        print("  ba.py -reparse     从缓存的邮件重新生成资源文件")
         print("  ba.py -preview     预览时间段操作配置")
         print("  ba.py -help        显示帮助信息")
         print("  --only             仅执行指定任务，跳过后续操作")
         print("  --date YYMMDD      指定日期（如260101表示2026年1月1日）")
+        print("  --force            数据未变化时也重新生成并上传报告")
         print("=" * 50)
         
         try:
@@ -619,13 +840,21 @@ def main():
     if args.check:
         baah_manager.run_check()
     elif args.monitor:
-        baah_manager.run_monitor(args.only)
+        baah_manager.run_monitor(args.only, args.force)
     elif args.getdata:
-        baah_manager.run_getdata(args.only, args.date)
+        baah_manager.run_getdata(args.only, args.date, args.force, args.from_date, args.to_date)
     elif args.send:
-        baah_manager.run_send()
+        baah_manager.run_send(args.force)
+    elif args.reportd:
+        baah_manager.run_reportd()
     elif args.writesuccess:
         baah_manager.run_writesuccess()
+    elif args.migrate:
+        baah_manager.run_migrate()
+    elif args.compact:
+        baah_manager.run_compact()
+    elif args.reparse:
+        baah_manager.run_reparse(args.only, args.force)
     elif args.preview:
         system_ops = SystemOperations()
         system_ops.get_scheduled_actions_preview()
@@ -635,6 +864,10 @@ def main():
         baah_manager.show_help()
     else:
         baah_manager.show_help()
+    
+    baah_manager.wait_upload_workers()
 
 if __name__ == "__main__":
+    # 打包为exe后，多账号并行生成报告的子进程需要此调用
+    multiprocessing.freeze_support()
     main()
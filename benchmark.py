@@ -0,0 +1,263 @@
+import os
+import io
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from config_manager import ConfigManager
+from report_generator import ReportGenerator
+from report_analytics import create_report_analytics, build_range_summaries
+from resource_index import ResourceIndex
+from resource_loader import JSON_BACKEND, load_json_file, parse_files, get_max_workers
+from template_renderer import load_template, minify_template
+
+# 合成数据的最后一天（固定日期，保证不同版本之间生成的数据完全相同）
+HISTORY_END_DATE = date(2025, 12, 31)
+# 模拟的报告生成时间（影响时间范围统计的截止日期）
+REPORT_TIME = datetime(2026, 1, 1)
+
+
+def generate_history(folder_path, years, seed=1, gap_ratio=0.05, negative_ratio=0.1, string_ratio=0.3):
+    """生成合成的资源文件夹内容，返回生成的天数
+
+    years: 历史数据年数
+    gap_ratio: 缺失天数的比例（模拟没有运行BAAH的日子）
+    negative_ratio: 青辉石减少的天数比例（任务期间或两天之间消耗了青辉石）
+    string_ratio: 资源值写成带千分位字符串（如 "12,345"）的比例
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    rnd = random.Random(seed)
+
+    def format_value(value):
+        return f"{value:,}" if rnd.random() < string_ratio else value
+
+    diamond = 20000
+    credit = 5000000
+    day = HISTORY_END_DATE - timedelta(days=int(365 * years) - 1)
+    days_count = 0
+    while day <= HISTORY_END_DATE:
+        if rnd.random() < gap_ratio:
+            day += timedelta(days=1)
+            continue
+
+        # 两天之间消耗青辉石（抽卡）
+        if rnd.random() < negative_ratio:
+            diamond = max(0, diamond - rnd.randint(100, 6000))
+
+        start_diamond = diamond
+        start_credit = credit
+        if rnd.random() < negative_ratio:
+            diamond = max(0, diamond - rnd.randint(1, 600))
+        else:
+            diamond += rnd.randint(0, 900)
+        credit += rnd.randint(-1000, 300000)
+
+        start_time = datetime(day.year, day.month, day.day, 4, rnd.randint(0, 59), rnd.randint(0, 59))
+        end_time = start_time + timedelta(seconds=rnd.randint(0, 7200))
+        resource_data = {
+            "start_time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            "start_resource": {"diamond": format_value(start_diamond), "credit": format_value(start_credit)},
+            "end_time": end_time.strftime('%Y-%m-%d %H:%M:%S'),
+            "end_resource": {"diamond": format_value(diamond), "credit": format_value(credit)}
+        }
+
+        file_path = os.path.join(folder_path, f"{day.strftime('%Y-%m-%d')}.json")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(resource_data, f, ensure_ascii=False, indent=4)
+
+        days_count += 1
+        day += timedelta(days=1)
+
+    return days_count
+
+
+class ReportBenchmark:
+    """报告生成各阶段的耗时测试
+
+    在临时目录中生成合成数据，按阶段分别计时（取多次运行的中位数），
+    不访问网络，也不修改配置文件。
+    """
+
+    # (阶段键, 显示名称)
+    STAGES = (
+        ('discovery', '文件发现'),
+        ('json_parse', 'JSON解析'),
+        ('value_parse', '数值解析 parse_resource_value'),
+        ('record_parse', '记录构建 parse_resource_data'),
+        ('aggregation', '统计汇总'),
+        ('minify', '模板压缩（无缓存）'),
+        ('render', 'HTML渲染'),
+        ('write', '写入文件'),
+        ('end_to_end_cold', '完整生成（无索引）'),
+        ('end_to_end_warm', '完整生成（索引命中）')
+    )
+
+    def __init__(self, work_dir, backend='auto', repeat=5):
+        self.config = ConfigManager()
+        self.work_dir = work_dir
+        self.backend = backend
+        self.repeat = repeat
+        self.folder_path = os.path.join(work_dir, 'resources')
+        self.output_path = os.path.join(work_dir, 'baah_report.html')
+
+        # 只在内存中修改配置，指向临时目录
+        self.config.set('file_paths.resources_folder', self.folder_path)
+        self.config.set('file_paths.html_output', self.output_path)
+        self.config.set('file_paths.status_file', os.path.join(work_dir, 'status.txt'))
+        self.config.set('storage.backend', 'json')
+        self.config.set('report.data_mode', 'inline')
+        self.config.set('report.analytics_backend', backend)
+        self.config.set('report.minify', True)
+        self.generator = ReportGenerator()
+
+    def _time(self, func, setup=None):
+        """运行repeat次并返回耗时中位数（毫秒）及最后一次的结果，setup的耗时不计入"""
+        timings = []
+        result = None
+        for _ in range(self.repeat):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            result = func(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+    def _list_files(self):
+        """与ResourceIndex相同的方式列出资源文件"""
+        with os.scandir(self.folder_path) as it:
+            return sorted(entry.path for entry in it
+                          if not entry.name.startswith('.') and entry.name.endswith('.json') and entry.is_file())
+
+    def _parse_files(self, file_paths):
+        """读取并解析所有JSON文件（与ResourceIndex相同：文件较多时使用线程池）"""
+        return [(os.path.basename(file_path).replace('.json', ''), file_data)
+                for file_path, file_data in parse_files(file_paths, load_json_file, get_max_workers(self.config))]
+
+    def _parse_values(self, parsed):
+        """只解析资源数值"""
+        parse_value = self.generator.parse_resource_value
+        for _, file_data in parsed:
+            parse_value(file_data['start_resource']['diamond'])
+            parse_value(file_data['end_resource']['diamond'])
+            parse_value(file_data['start_resource']['credit'])
+            parse_value(file_data['end_resource']['credit'])
+
+    def _build_records(self, parsed):
+        """构建每日数据"""
+        return [self.generator.parse_resource_data(date_str, file_data) for date_str, file_data in parsed]
+
+    def _aggregate(self, records):
+        """统计汇总（与process_baah_data相同：统计引擎和时间范围预计算）"""
+        report = create_report_analytics(records, self.backend).run()
+        ranges = build_range_summaries(report['daily'], report['reduction'], REPORT_TIME)
+        return report, ranges
+
+    def _write(self, text):
+        """先写临时文件再替换，与generate_html_report相同"""
+        temp_path = self.output_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(text)
+        os.replace(temp_path, self.output_path)
+
+    def _process(self):
+        """完整运行process_baah_data（屏蔽其输出）"""
+        with redirect_stdout(io.StringIO()):
+            return self.generator.process_baah_data()
+
+    def _remove_index(self):
+        """删除资源索引，模拟首次运行"""
+        index_path = os.path.join(self.folder_path, ResourceIndex.INDEX_FILE_NAME)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        return ()
+
+    def run(self, years, seed, gap_ratio, negative_ratio, string_ratio):
+        """生成数据并测试各阶段，返回 ({阶段键: 毫秒}, 信息字典)"""
+        days_count = generate_history(self.folder_path, years, seed, gap_ratio, negative_ratio, string_ratio)
+        timings = {}
+
+        timings['discovery'], file_paths = self._time(self._list_files)
+        timings['json_parse'], parsed = self._time(lambda: self._parse_files(file_paths))
+        timings['value_parse'], _ = self._time(lambda: self._parse_values(parsed))
+        timings['record_parse'], records = self._time(lambda: self._build_records(parsed))
+
+        # 统计引擎会对数据排序并补充字段，每次使用新的副本
+        timings['aggregation'], (report, ranges) = self._time(
+            self._aggregate, setup=lambda: ([record.copy() for record in records],))
+
+        template_path = self.generator.get_template_path()
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template_text = f.read()
+        timings['minify'], _ = self._time(lambda: minify_template(template_text, self.generator.get_strip_sections()))
+        
+        template = self.generator.load_report_template()
+        values = self.generator.build_template_values(report['daily'], report['weekly'], report['monthly'],
+                                                      report['reduction'], report['summary'], ranges, REPORT_TIME)
+        timings['render'], html = self._time(lambda: template.render(values))
+        
+        # 对比：不压缩时的报告（原模板）
+        raw_html = load_template(template_path).render(values)
+        timings['write'], _ = self._time(lambda: self._write(html))
+
+        timings['end_to_end_cold'], _ = self._time(self._process, setup=self._remove_index)
+        timings['end_to_end_warm'], _ = self._time(self._process)
+
+        info = {
+            'days': days_count,
+            'engine': type(create_report_analytics([record.copy() for record in records], self.backend)).__name__,
+            'raw_kb': len(raw_html.encode('utf-8')) / 1024,
+            'html_kb': len(html.encode('utf-8')) / 1024,
+            # 通过Gitee contents接口上传时内容需要base64编码
+            'raw_upload_kb': len(base64.b64encode(raw_html.encode('utf-8'))) / 1024,
+            'upload_kb': len(base64.b64encode(html.encode('utf-8'))) / 1024
+        }
+        return timings, info
+
+
+def print_table(results):
+    """打印结果表格（每列为一种数据规模，单位毫秒）"""
+    column_width = 14
+    headers = [f"{years:g}年/{info['days']}天" for years, _, info in results]
+    print(''.join(header.rjust(column_width) for header in headers) + '  阶段（毫秒，中位数）')
+    print('-' * (column_width * len(results) + 24))
+    for key, label in ReportBenchmark.STAGES:
+        print(''.join(f"{timings[key]:{column_width}.2f}" for _, timings, _ in results) + '  ' + label)
+    print('-' * (column_width * len(results) + 24))
+    print(''.join(f"{info['raw_kb']:{column_width}.1f}" for _, _, info in results) + '  报告大小（不压缩，KB）')
+    print(''.join(f"{info['html_kb']:{column_width}.1f}" for _, _, info in results) + '  报告大小（KB）')
+    print(''.join(f"{info['raw_upload_kb']:{column_width}.1f}" for _, _, info in results) + '  上传大小（不压缩，base64，KB）')
+    print(''.join(f"{info['upload_kb']:{column_width}.1f}" for _, _, info in results) + '  上传大小（base64，KB）')
+    print(''.join(f"{info['raw_kb'] - info['html_kb']:{column_width}.1f}" for _, _, info in results) + '  压缩节省（KB）')
+    print(''.join(f"{info['engine'].replace('ReportAnalytics', '') or 'Python':>{column_width}}"
+                  for _, _, info in results) + '  统计引擎')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BAAH报告生成性能基准')
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 3, 5], help='合成历史数据的年数，可指定多个（默认 1 3 5）')
+    parser.add_argument('--repeat', type=int, default=5, help='每个阶段的运行次数，取中位数（默认5）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子（默认1）')
+    parser.add_argument('--gap', type=float, default=0.05, help='缺失天数比例（默认0.05）')
+    parser.add_argument('--negative', type=float, default=0.1, help='青辉石减少的天数比例（默认0.1）')
+    parser.add_argument('--string', type=float, default=0.3, help='字符串格式资源值的比例（默认0.3）')
+    parser.add_argument('--backend', choices=['auto', 'numpy', 'python'], default='auto', help='统计引擎（默认auto）')
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}，JSON解析库 {JSON_BACKEND}，每个阶段运行 {args.repeat} 次")
+    results = []
+    for years in args.years:
+        with tempfile.TemporaryDirectory(prefix='baah_benchmark_') as work_dir:
+            benchmark = ReportBenchmark(work_dir, args.backend, args.repeat)
+            timings, info = benchmark.run(years, args.seed, args.gap, args.negative, args.string)
+        results.append((years, timings, info))
+
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,39 @@
 import json
 import os
 import sys
+from abc import ABC, abstractmethod
 from datetime import datetime
 
-class ConfigManager:
+def to_bool(value):
+    """转换为布尔值（兼容WebUI保存的字符串 'true'/'false' 等）"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes', 'on')
+    return bool(value)
+
+class ConfigReader(ABC):
+    """配置值的类型转换（WebUI保存的值为字符串），子类提供 get(key, default)"""
+    
+    @abstractmethod
+    def get(self, key, default=None):
+        """按 'a.b' 形式的键获取配置值，不存在时返回default"""
+    
+    def get_bool(self, key, default=False):
+        """获取布尔配置值（兼容WebUI保存的字符串）"""
+        return to_bool(self.get(key, default))
+    
+    def data_dir(self):
+        """程序数据目录（file_paths.status_file 所在目录），存放各种运行状态、队列和缓存"""
+        return os.path.dirname(self.get('file_paths.status_file'))
+    
+    def get_number(self, key, default):
+        """获取正数配置值（如超时秒数，兼容WebUI保存的字符串），无效或不大于0时返回默认值"""
+        try:
+            value = float(self.get(key, default))
+            return value if value > 0 else default
+        except (TypeError, ValueError):
+            return default
+
+class ConfigManager(ConfigReader):
     _instance = None
     _config = None
     
@@ -33,7 +63,9 @@ class ConfigManager:
                 "authorization_code": "your_authorization_code",
                 "folder": "INBOX",
                 "subject_keyword": "BAAH",
-                "sender": "baah@example.com"
+                "sender": "baah@example.com",
+                "backfill_connections": 3,
+                "message_cache": True
             },
             "process_names": {
                 "baah_process": "BAAH.exe",
@@ -75,8 +107,39 @@ class ConfigManager:
                 "branch": "main",
                 "access_token": "your_access_token",
                 "file_path": "reports/baah_report.html",
-                "enabled": true
-            }
+                "enabled": True,
+                "api_base": "https://gitee.com/api/v5",
+                "connect_timeout": 10,  # 连接超时（秒）
+                "read_timeout": 60,  # 读取超时（秒）
+                "batch_commit": True  # 多个文件合并为一次提交
+            },
+            "storage": {
+                "backend": "json",  # json: 每天一个JSON文件; sqlite: 单个SQLite数据库
+                "sqlite_file": "data/resources.db",
+                "load_workers": 0  # 并行读取资源文件的线程数，0为自动
+            },
+            "report": {
+                "analytics_backend": "auto",  # auto / numpy / python
+                "data_mode": "inline",  # inline: 数据嵌入报告; sidecar: 数据写入报告旁的数据文件
+                "sidecar_gzip": False,
+                "minify": True,  # 压缩报告模板中的CSS/JS/HTML
+                "strip_sections": "",  # 不需要的报告区块，逗号分隔：weekly,monthly,reduction
+                "max_workers": 0  # 多账号并行生成报告的进程数，0为自动
+            },
+            "upload": {
+                "initial_backoff": 5,  # 上传失败后首次重试的等待时间（秒），之后每次翻倍
+                "max_backoff": 300,  # 重试等待时间上限（秒）
+                "worker_deadline_minutes": 30,  # 每次运行最多尝试上传的时间，超过后留到下次运行
+                "exit_grace_seconds": 30,  # -check、-send 等命令结束后等待上传完成的时间（秒），超过后直接退出
+                "max_age_days": 7  # 超过该天数仍未上传成功的任务将被放弃
+            },
+            "report_daemon": {
+                "poll_interval": 0.5,  # ba.py -reportd 扫描资源文件夹的间隔（秒）
+                "settle_seconds": 0.2  # 发现变化后等待文件写入完成的时间（秒）
+            },
+            # 多账号：每项为 {"name": 账号名, "enabled": true, "subject_keyword": 邮件主题关键字}，
+            # 也可以包含 email 等配置段覆盖全局配置；为空时为单账号模式
+            "accounts": []
         }
     
     def _load_config(self):
@@ -244,6 +307,11 @@ class ConfigManager:
         
         # 保留根目录
         root_dir = self._config.get('root_dir', '')
+        
+        # WebUI不编辑多账号配置，提交的配置中没有accounts时保留原有账号
+        if 'accounts' not in new_config and 'accounts' in self._config:
+            new_config['accounts'] = self._config['accounts']
+        
         self._config = new_config
         if root_dir:
             self._config['root_dir'] = root_dir
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from config_manager import ConfigManager
+from email_processor import EmailProcessor
+from resource_store import ResourceStore
+from resource_archive import ResourceArchive
+
+
+class EmailBackfill:
+    """按日期范围补全缺失的资源数据
+
+    找出资源文件夹（包括月度归档）或SQLite数据库中缺少的日期，
+    用少量并发的邮箱连接分批获取：每个连接只登录一次，依次处理分配到的日期，每天处理完立即保存
+    """
+
+    # 同时使用的邮箱连接数上限（邮箱服务器通常限制同一账号的并发连接）
+    MAX_CONNECTIONS = 8
+
+    def __init__(self, account=None):
+        # account为AccountConfig时，只补全该账号的资源数据
+        self.account = account
+        self.config = account or ConfigManager()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_date(value):
+        """解析 YYMMDD 格式的日期，格式错误时返回None"""
+        try:
+            return datetime.strptime(value, '%y%m%d')
+        except (TypeError, ValueError):
+            print(f"日期格式错误: {value}，应为YYMMDD（如260101）")
+            return None
+
+    @classmethod
+    def parse_range(cls, from_date, to_date=None):
+        """解析日期范围，结束日期默认为今天；格式错误或开始日期晚于结束日期时返回None"""
+        start = cls.parse_date(from_date)
+        end = cls.parse_date(to_date) if to_date else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if not start or not end:
+            return None
+        if start > end:
+            print(f"开始日期 {start.strftime('%Y-%m-%d')} 晚于结束日期 {end.strftime('%Y-%m-%d')}")
+            return None
+        return start, end
+
+    def get_connections(self):
+        """并发的邮箱连接数（email.backfill_connections）"""
+        connections = int(self.config.get_number('email.backfill_connections', 3))
+        return max(1, min(connections, self.MAX_CONNECTIONS))
+
+    def get_existing_dates(self, start_date, end_date):
+        """日期范围内已有资源数据的日期（YYYY-MM-DD）"""
+        if ResourceStore.is_enabled(self.config):
+            return set(ResourceStore(config=self.config).list_dates(start_date, end_date))
+        folder_path = self.config.get('file_paths.resources_folder')
+        return set(ResourceArchive(folder_path).list_dates(start_date, end_date))
+
+    def list_missing_dates(self, start, end):
+        """日期范围内（包含两端）缺少资源数据的日期，返回按日期排列的datetime列表"""
+        existing = self.get_existing_dates(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        missing = []
+        day = start
+        while day <= end:
+            if day.strftime('%Y-%m-%d') not in existing:
+                missing.append(day)
+            day += timedelta(days=1)
+        return missing
+
+    def _report_progress(self, progress, day, success):
+        """记录并输出一天的处理结果"""
+        with self._lock:
+            progress['done'] += 1
+            if success:
+                progress['saved'] += 1
+            elapsed = time.time() - progress['start_time']
+            rate = progress['done'] / elapsed if elapsed > 0 else 0
+            status = "已保存" if success else "未获取到数据"
+            print(f"[{progress['done']}/{progress['total']}] {day.strftime('%Y-%m-%d')} {status}"
+                  f"（已保存 {progress['saved']} 天，{rate:.2f} 天/秒）")
+
+    def _worker(self, dates, progress):
+        """工作线程：登录一次邮箱，依次处理队列中的日期"""
+        processor = EmailProcessor(self.account)
+        mail = None
+        mailbox_status = None
+        try:
+            while True:
+                try:
+                    day = dates.get_nowait()
+                except queue.Empty:
+                    return
+
+                if mail is None:
+                    mail = processor.connect_to_email()
+                    if mail is None:
+                        # 无法登录时放回队列，由其他连接处理
+                        dates.put(day)
+                        return
+                    mailbox_status = processor.get_mailbox_status(mail)
+
+                success = False
+                try:
+                    success = processor.process_mailbox(mail, day.strftime('%y%m%d'), mailbox_status)
+                except Exception as e:
+                    print(f"处理 {day.strftime('%Y-%m-%d')} 的邮件时出错: {e}")
+                    # 连接可能已断开，下一天重新登录
+                    try:
+                        mail.logout()
+                    except:
+                        pass
+                    mail = None
+                self._report_progress(progress, day, success)
+        finally:
+            if mail is not None:
+                try:
+                    mail.logout()
+                except:
+                    pass
+
+    def run(self, start, end):
+        """补全 start 到 end（datetime，包含两端）之间缺少的资源数据，返回保存的天数"""
+        missing = self.list_missing_dates(start, end)
+        if not missing:
+            print(f"{start.strftime('%Y-%m-%d')} 至 {end.strftime('%Y-%m-%d')} 的资源数据已完整，无需获取")
+            return 0
+
+        connections = min(self.get_connections(), len(missing))
+        print(f"{start.strftime('%Y-%m-%d')} 至 {end.strftime('%Y-%m-%d')} 缺少 {len(missing)} 天的资源数据，"
+              f"使用 {connections} 个邮箱连接获取")
+
+        dates = queue.Queue()
+        for day in missing:
+            dates.put(day)
+        progress = {'total': len(missing), 'done': 0, 'saved': 0, 'start_time': time.time()}
+
+        workers = [threading.Thread(target=self._worker, args=(dates, progress), daemon=True)
+                   for _ in range(connections)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        elapsed = time.time() - progress['start_time']
+        skipped = dates.qsize()
+        if skipped:
+            print(f"无法连接邮箱，{skipped} 天未处理")
+        rate = progress['done'] / elapsed if elapsed > 0 else 0
+        print(f"补全完成: 处理 {progress['done']} 天，保存 {progress['saved']} 天，"
+              f"用时 {elapsed:.1f} 秒（{rate:.2f} 天/秒）")
+        return progress['saved']
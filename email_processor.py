@@ -4,13 +4,52 @@ from email.header import decode_header
 import re
 import ast
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 from config_manager import ConfigManager
+from resource_store import ResourceStore
+from resource_archive import ResourceArchive
+from imap_state import ImapState
+from message_cache import MessageCache
+from imap_response import parse_fetch_response, find_text_part, decode_part
+
+# BAAH结束邮件的主题标记
+SUBJECT_MARKER = "BAAH结束"
+
+# 搜索的邮箱文件夹
+MAILBOX = 'inbox'
+
+def quote_imap_string(value):
+    """IMAP带引号的字符串"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def format_message_set(uids):
+    """将UID列表压缩为IMAP消息集（连续的UID合并为范围，如 101:105,108）"""
+    numbers = sorted(set(int(uid) for uid in uids))
+    ranges = []
+    start = prev = numbers[0]
+    for number in numbers[1:]:
+        if number != prev + 1:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = number
+        prev = number
+    ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ','.join(ranges)
+
 
 class EmailProcessor:
-    def __init__(self):
-        self.config = ConfigManager()
+    def __init__(self, account=None):
+        # account为AccountConfig时，只处理属于该账号的邮件，资源数据保存到该账号的分区
+        self.account = account
+        self.config = account or ConfigManager()
+        # 最近一次搜索结果中的最大UID（搜索失败时为None）
+        self.last_search_uid = None
+        # 最近一次保存的资源数据的日期
+        self.last_saved_date = None
+        # 读取主题时一并获取的邮件结构（BODYSTRUCTURE）：{UID: 结构}
+        self.body_structures = {}
     
     def decode_subject(self, encoded_subject):
         """解码邮件主题"""
@@ -49,59 +88,222 @@ class EmailProcessor:
                 self.config.get('email.email_account'),
                 self.config.get('email.authorization_code')
             )
-            mail.select('inbox')
+            mail.select(MAILBOX)
             return mail
         except Exception as e:
             print(f"连接邮箱失败: {e}")
             return None
     
-    def search_baah_emails(self, mail, date=None):
-        """搜索BAAH邮件"""
+    def get_target_date(self, date=None):
+        """解析 YYMMDD 格式的日期，未指定或格式错误时为今天"""
         if date:
             # 解析日期格式 YYMMDD
             try:
                 year = int('20' + date[:2])
                 month = int(date[2:4])
                 day = int(date[4:6])
-                target_date = datetime(year, month, day).strftime('%d-%b-%Y')
-                print(f"搜索 {year}-{month:02d}-{day:02d} 的邮件")
+                return datetime(year, month, day)
             except ValueError:
                 print(f"日期格式错误: {date}，使用今天的日期")
-                target_date = datetime.now().strftime('%d-%b-%Y')
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    def get_mailbox_key(self):
+        """邮件同步状态中的邮箱标识（多账号时每个账号分别记录）"""
+        mailbox_key = f"{self.config.get('email.email_account')}@{self.config.get('email.imap_server')}/{MAILBOX}"
+        if self.account is not None:
+            mailbox_key += f"#{self.account.name}"
+        return mailbox_key
+    
+    def get_mailbox_status(self, mail):
+        """读取SELECT时服务器返回的 UIDVALIDITY 和 UIDNEXT（服务器未返回时为None）"""
+        status = []
+        for name in ('UIDVALIDITY', 'UIDNEXT'):
+            _, data = mail.response(name)
+            try:
+                status.append(int(data[-1]))
+            except (TypeError, ValueError, IndexError):
+                status.append(None)
+        return tuple(status)
+    
+    def get_search_filters(self):
+        """服务器端筛选条件：[(字段, 值)]
+        
+        包含发件人（email.sender）和主题关键字（"BAAH结束"、账号的 subject_keyword、email.subject_keyword），
+        被其他关键字包含的关键字不再重复
+        """
+        filters = []
+        sender = str(self.config.get('email.sender') or '').strip()
+        if sender:
+            filters.append(('FROM', sender))
+        
+        account_keyword = self.account.settings.get('subject_keyword') if self.account is not None else None
+        candidates = [str(keyword or '').strip() for keyword in
+                      (account_keyword, SUBJECT_MARKER, self.config.get('email.subject_keyword'))]
+        keywords = []
+        for keyword in candidates:
+            if not keyword or keyword in keywords:
+                continue
+            if any(keyword in other and keyword != other for other in candidates):
+                continue
+            keywords.append(keyword)
+        filters.extend(('SUBJECT', keyword) for keyword in keywords)
+        return filters
+    
+    def search_uids(self, mail, criteria, filters=()):
+        """UID SEARCH，返回按UID升序的UID列表（bytes），搜索失败时返回None
+        
+        filters 中的ASCII值作为带引号的字符串发送；含中文的值以UTF-8字面量发送（CHARSET UTF-8），
+        imaplib每条命令只能附带一个字面量，其余含中文的条件由本地筛选
+        """
+        args = list(criteria)
+        literal = None
+        for key, value in filters:
+            if value.isascii():
+                args += [key, quote_imap_string(value)]
+            elif literal is None:
+                literal = (key, value)
+        
+        try:
+            if literal is not None:
+                # 字面量附加在命令末尾，必须放在最后一个条件
+                mail.literal = literal[1].encode('utf-8')
+                result, data = mail.uid('SEARCH', 'CHARSET', 'UTF-8', *args, literal[0])
+            else:
+                result, data = mail.uid('SEARCH', *args)
+        except imaplib.IMAP4.error as e:
+            print(f"邮件搜索失败: {e}")
+            return None
+        
+        if result != 'OK':
+            return None
+        uids = data[0].split() if data and data[0] else []
+        return sorted(uids, key=int)
+    
+    def fetch_headers(self, mail, uids):
+        """一次UID FETCH读取多封邮件的主题、发件人和邮件结构，返回按UID升序的 [(UID, 主题, 发件人)]
+        
+        邮件结构保存在 body_structures，读取正文时只获取纯文本部分
+        """
+        if not uids:
+            return []
+        
+        result, data = mail.uid('FETCH', format_message_set(uids),
+                                '(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM)] BODYSTRUCTURE)')
+        if result != 'OK':
+            print("读取邮件主题失败")
+            return []
+        
+        try:
+            messages = parse_fetch_response(data)
+        except Exception as e:
+            print(f"解析邮件主题失败: {e}")
+            return []
+        
+        headers = []
+        for items in messages:
+            uid = items.get('UID')
+            header = next((value for name, value in items.items() if name.startswith('BODY[HEADER')), None)
+            if uid is None or not isinstance(header, bytes):
+                continue
+            uid = uid.encode('ascii')
+            if items.get('BODYSTRUCTURE'):
+                self.body_structures[uid] = items['BODYSTRUCTURE']
+            msg = email.message_from_bytes(header)
+            try:
+                subject = self.decode_subject(msg['Subject'] or '')
+            except Exception:
+                continue
+            headers.append((uid, subject, str(msg['From'] or '')))
+        headers.sort(key=lambda header: int(header[0]))
+        return headers
+    
+    def search_baah_emails(self, mail, date=None, since_uid=None):
+        """搜索BAAH结束邮件，返回按UID升序的UID列表
+        
+        主题和发件人条件交给服务器筛选，再一次读取所有结果的主题；
+        服务器不支持这些条件或没有结果时（如 email.sender 与实际发件人不同），改为只按日期搜索。
+        指定 since_uid 时只搜索当天UID大于它的新邮件（增量同步，新邮件很少，不再使用筛选条件）。
+        搜索结果中的最大UID记录在 last_search_uid，搜索失败时为None
+        """
+        target_datetime = self.get_target_date(date)
+        target_date = target_datetime.strftime('%d-%b-%Y')
+        if date:
+            print(f"搜索 {target_datetime.strftime('%Y-%m-%d')} 的邮件")
         else:
-            target_date = datetime.now().strftime('%d-%b-%Y')
             print("搜索今天的邮件")
         
         # 搜索指定日期当天的邮件（使用SINCE和BEFORE组合）
         # 计算第二天的日期用于BEFORE搜索
-        target_datetime = datetime.strptime(target_date, '%d-%b-%Y')
         next_day = (target_datetime + timedelta(days=1)).strftime('%d-%b-%Y')
+        criteria = ['SINCE', target_date, 'BEFORE', next_day]
+        
+        if since_uid is not None:
+            email_ids = self.search_uids(mail, ['UID', f"{since_uid + 1}:*"] + criteria)
+            # "n:*" 在没有更新的邮件时也会返回最大的UID
+            if email_ids is not None:
+                email_ids = [email_id for email_id in email_ids if int(email_id) > since_uid]
+        else:
+            filters = self.get_search_filters()
+            email_ids = self.search_uids(mail, criteria, filters)
+            if not email_ids and filters:
+                email_ids = self.search_uids(mail, criteria)
         
-        result, data = mail.search(None, f'SINCE "{target_date}" BEFORE "{next_day}"')
+        self.last_search_uid = None
+        if email_ids is not None:
+            self.last_search_uid = max([int(email_id) for email_id in email_ids] + [since_uid or 0])
         
-        if result != 'OK' or not data[0]:
-            print(f"未找到 {target_date} 的邮件")
+        if not email_ids:
+            if since_uid is not None:
+                print(f"没有UID大于 {since_uid} 的新邮件")
+            else:
+                print(f"未找到 {target_date} 的邮件")
             return []
         
-        email_ids = data[0].split()
         print(f"找到 {len(email_ids)} 封邮件")
         
         baah_end_emails = []
-        for email_id in email_ids:
-            result, header_data = mail.fetch(email_id, '(BODY.PEEK[HEADER.FIELDS (SUBJECT)])')
-            if result == 'OK':
-                msg = email.message_from_bytes(header_data[0][1])
-                subject = self.decode_subject(msg['Subject'])
-                
-                if "BAAH结束" in subject:
-                    baah_end_emails.append(email_id)
-                    print(f"找到BAAH结束邮件: {subject}")
+        for email_id, subject, _ in self.fetch_headers(mail, email_ids):
+            if SUBJECT_MARKER in subject and (self.account is None or self.account.matches_subject(subject)):
+                baah_end_emails.append(email_id)
+                print(f"找到BAAH结束邮件: {subject}")
         
         return baah_end_emails
     
+    def get_body_structure(self, mail, email_id):
+        """获取邮件结构，读取主题时已获取的直接使用"""
+        structure = self.body_structures.get(email_id)
+        if structure:
+            return structure
+        result, data = mail.uid('FETCH', email_id, '(BODYSTRUCTURE)')
+        if result != 'OK':
+            return None
+        messages = parse_fetch_response(data)
+        return messages[0].get('BODYSTRUCTURE') if messages else None
+    
     def get_email_body(self, mail, email_id):
-        """获取邮件正文"""
-        result, data = mail.fetch(email_id, '(RFC822)')
+        """获取邮件正文
+        
+        根据邮件结构只获取纯文本部分（BODY.PEEK[部分编号]）并按传输编码解码，
+        读取的数据量与附件大小无关；找不到纯文本部分或解码失败时读取完整邮件
+        """
+        try:
+            text_part = find_text_part(self.get_body_structure(mail, email_id))
+            if text_part:
+                section, encoding, charset = text_part
+                result, data = mail.uid('FETCH', email_id, f'(BODY.PEEK[{section}])')
+                if result == 'OK':
+                    messages = parse_fetch_response(data)
+                    payload = messages[0].get(f'BODY[{section}]') if messages else None
+                    if payload is not None:
+                        return decode_part(payload, encoding, charset)
+        except Exception as e:
+            print(f"读取邮件纯文本部分失败，改为读取完整邮件: {e}")
+        
+        return self.get_full_email_body(mail, email_id)
+    
+    def get_full_email_body(self, mail, email_id):
+        """读取完整邮件（RFC822）并提取纯文本正文"""
+        result, data = mail.uid('FETCH', email_id, '(RFC822)')
         if result != 'OK':
             print("获取邮件内容失败")
             return None
@@ -123,6 +325,49 @@ class EmailProcessor:
         
         return body
     
+    def get_message_cache(self):
+        """邮件正文缓存，未开启（email.message_cache）时返回None"""
+        if not MessageCache.is_enabled(self.config):
+            return None
+        return MessageCache(self.get_mailbox_key())
+    
+    def get_cached_body(self, mail, uidvalidity, email_id, date_str, target_date=None):
+        """获取邮件正文，已缓存时直接使用缓存，否则读取后写入缓存"""
+        message_cache = self.get_message_cache()
+        if message_cache is None:
+            return self.get_email_body(mail, email_id)
+        
+        body = message_cache.load(uidvalidity, email_id)
+        if body is not None:
+            print(f"使用缓存的邮件正文（UID {int(email_id)}）")
+            return body
+        
+        body = self.get_email_body(mail, email_id)
+        if body:
+            message_cache.save(uidvalidity, email_id, date_str, target_date, body)
+        return body
+    
+    def reparse_cached_messages(self, max_workers=None):
+        """不连接邮箱，从邮件正文缓存重新生成所有资源文件（每个日期使用最新的一封邮件），返回生成的天数"""
+        message_cache = MessageCache(self.get_mailbox_key())
+        messages = message_cache.latest_by_date(max_workers)
+        if not messages:
+            print(f"没有缓存的邮件: {message_cache.cache_folder}")
+            return 0
+        
+        print(f"从缓存重新解析 {len(messages)} 天的邮件: {message_cache.cache_folder}")
+        
+        def reparse(message):
+            try:
+                return self.process_success_email(message['body'], message['target_date'])
+            except Exception as e:
+                print(f"重新解析 {message['date']} 的邮件时出错: {e}")
+                return False
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(reparse, [messages[date_str] for date_str in sorted(messages)]))
+        return sum(1 for success in results if success)
+    
     def process_success_email(self, body, target_date=None):
         """处理成功邮件并提取资源信息"""
         start_time = None
@@ -150,7 +395,7 @@ class EmailProcessor:
             
             folder_name = self.config.get('file_paths.resources_folder')
             if not os.path.exists(folder_name):
-                os.makedirs(folder_name)
+                os.makedirs(folder_name, exist_ok=True)
             
             # 确定文件名使用的日期
             if target_date:
@@ -174,10 +419,24 @@ class EmailProcessor:
                 # 使用当前日期
                 filename_date = datetime.now().strftime('%Y-%m-%d')
             
+            self.last_saved_date = filename_date
+            
+            if ResourceStore.is_enabled(self.config):
+                # 使用SQLite存储
+                store = ResourceStore(config=self.config)
+                if store.list_dates(filename_date, filename_date):
+                    print(f"{filename_date} 的资源数据已存在，将覆盖")
+                store.save_day(filename_date, resource_data)
+                print(f"资源已保存到数据库: {store.db_path} ({filename_date})")
+                return True
+            
             filename = os.path.join(folder_name, f"{filename_date}.json")
             
-            with open(filename, 'w', encoding='utf-8') as f:
+            # 先写入隐藏的临时文件再替换，报告常驻进程不会读到写了一半的文件
+            temp_filename = os.path.join(folder_name, f".{filename_date}.json.tmp")
+            with open(temp_filename, 'w', encoding='utf-8') as f:
                 json.dump(resource_data, f, ensure_ascii=False, indent=4)
+            os.replace(temp_filename, filename)
             
             print(f"资源已保存到: {filename}")
             return True
@@ -185,30 +444,25 @@ class EmailProcessor:
             print("未找到完整的资源信息")
             return False
     
+    def has_resource_data(self, date_str):
+        """某天的资源数据是否已保存（资源文件、月度归档或SQLite数据库）"""
+        if not date_str:
+            return False
+        if ResourceStore.is_enabled(self.config):
+            return bool(ResourceStore(config=self.config).list_dates(date_str, date_str))
+        folder_name = self.config.get('file_paths.resources_folder')
+        if os.path.exists(os.path.join(folder_name, f"{date_str}.json")):
+            return True
+        return ResourceArchive(folder_name).has_date(date_str)
+    
     def process_baah_email(self, date=None):
-        """处理BAAH邮件的主函数"""
+        """处理BAAH邮件的主函数（登录邮箱，处理一天的邮件后退出登录）"""
         mail = self.connect_to_email()
         if not mail:
             return False
         
         try:
-            baah_emails = self.search_baah_emails(mail, date)
-            if not baah_emails:
-                if date:
-                    print(f"未找到指定日期的BAAH结束邮件")
-                else:
-                    print("未找到今天的BAAH结束邮件")
-                return False
-            
-            latest_email_id = baah_emails[-1]
-            body = self.get_email_body(mail, latest_email_id)
-            
-            if body:
-                success = self.process_success_email(body, date)
-                return success
-            else:
-                return False
-                
+            return self.process_mailbox(mail, date)
         except Exception as e:
             print(f"处理邮件时出错: {e}")
             return False
@@ -216,4 +470,55 @@ class EmailProcessor:
             try:
                 mail.logout()
             except:
-                pass
\ No newline at end of file
+                pass
+    
+    def process_mailbox(self, mail, date=None, mailbox_status=None):
+        """在已登录的邮箱连接上处理某一天的BAAH邮件
+        
+        同一日期再次获取时，根据邮件同步状态只搜索上次之后的新邮件；
+        没有新的BAAH结束邮件且之前的数据仍在时直接返回True，不再读取邮件正文。
+        同一连接处理多天时，mailbox_status 传入连接时读取的 (UIDVALIDITY, UIDNEXT)（SELECT的响应只能读取一次）
+        """
+        imap_state = ImapState()
+        mailbox_key = self.get_mailbox_key()
+        uidvalidity, uidnext = mailbox_status or self.get_mailbox_status(mail)
+        date_str = self.get_target_date(date).strftime('%Y-%m-%d')
+        checkpoint = imap_state.get_day(mailbox_key, uidvalidity, date_str)
+        
+        if checkpoint:
+            baah_emails = self.search_baah_emails(mail, date, checkpoint['last_uid'])
+            if not baah_emails and checkpoint.get('baah_uid'):
+                if self.has_resource_data(checkpoint.get('saved_date')):
+                    print(f"{checkpoint['saved_date']} 的BAAH结束邮件已处理（UID {checkpoint['baah_uid']}），没有新的结束邮件")
+                    imap_state.update_day(mailbox_key, uidvalidity, date_str, self.last_search_uid)
+                    return True
+                print("之前保存的资源数据已不存在，重新搜索当天的邮件")
+                baah_emails = self.search_baah_emails(mail, date)
+        else:
+            baah_emails = self.search_baah_emails(mail, date)
+        
+        # 搜索成功时，SELECT之前到达的邮件都已检查过
+        scanned_uid = self.last_search_uid
+        if scanned_uid is not None and uidnext:
+            scanned_uid = max(scanned_uid, uidnext - 1)
+        
+        if not baah_emails:
+            imap_state.update_day(mailbox_key, uidvalidity, date_str, scanned_uid)
+            if date:
+                print(f"未找到指定日期的BAAH结束邮件")
+            else:
+                print("未找到今天的BAAH结束邮件")
+            return False
+        
+        latest_email_id = baah_emails[-1]
+        body = self.get_cached_body(mail, uidvalidity, latest_email_id, date_str, date)
+        
+        if body:
+            success = self.process_success_email(body, date)
+            if success:
+                imap_state.update_day(mailbox_key, uidvalidity, date_str, scanned_uid,
+                                      int(latest_email_id), self.last_saved_date)
+            return success
+        else:
+            return False
+
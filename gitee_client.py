@@ -0,0 +1,270 @@
+import base64
+import hashlib
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from config_manager import ConfigManager
+
+# 所有Gitee请求共用的会话（保持连接复用，首次使用时创建）
+_session = None
+
+
+def get_session():
+    """获取共用的HTTP会话（带连接池）"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Content-Type": "application/json;charset=UTF-8"
+        })
+        _session = session
+    return _session
+
+
+def git_blob_sha(content):
+    """计算文件内容的git blob SHA-1（与Gitee contents接口返回的sha一致）"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class GiteeClient:
+    """Gitee仓库文件上传客户端
+
+    多个文件通过提交接口（commits）合并为一次提交：先读取分支的文件树得到各文件的sha，
+    只提交与本地文件git blob SHA-1不同的文件；提交接口不可用时改为通过contents接口逐个上传。
+    所有请求共用一个带连接池的会话，并设置连接和读取超时，避免网络卡住时一直等待。
+    """
+
+    DEFAULT_API_BASE = "https://gitee.com/api/v5"
+    DEFAULT_CONNECT_TIMEOUT = 10
+    DEFAULT_READ_TIMEOUT = 60
+
+    def __init__(self, config=None):
+        # config可以是按账号分区的配置（AccountConfig），默认使用全局配置
+        self.config = config or ConfigManager()
+        self.owner = self.config.get('gitee.owner')
+        self.repo = self.config.get('gitee.repo')
+        self.branch = self.config.get('gitee.branch')
+        self.access_token = self.config.get('gitee.access_token')
+        self.api_base = (self.config.get('gitee.api_base') or self.DEFAULT_API_BASE).rstrip('/')
+        self.timeout = (
+            self.config.get_number('gitee.connect_timeout', self.DEFAULT_CONNECT_TIMEOUT),
+            self.config.get_number('gitee.read_timeout', self.DEFAULT_READ_TIMEOUT)
+        )
+        self.session = get_session()
+
+    def is_configured(self):
+        """仓库信息是否完整"""
+        return all([self.owner, self.repo, self.access_token])
+
+    def repo_url(self, path):
+        """仓库相关接口的地址"""
+        return f"{self.api_base}/repos/{self.owner}/{self.repo}/{path}"
+
+    def contents_url(self, file_name):
+        """contents接口地址"""
+        return self.repo_url(f"contents/{file_name}")
+
+    def commit_message(self):
+        """提交说明"""
+        return f"更新BAAH任务报告 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+
+    def get_remote_tree(self):
+        """读取分支最新提交的文件树
+
+        返回 {文件路径: sha}，分支不存在（空仓库）、文件树不完整或请求失败时返回None
+        """
+        params = {"access_token": self.access_token}
+        response = self.session.get(self.repo_url(f"branches/{self.branch}"), params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            print(f"读取分支 {self.branch} 失败: {response.status_code}")
+            return None
+
+        commit = response.json().get('commit') or {}
+        tree_sha = ((commit.get('commit') or {}).get('tree') or {}).get('sha') or commit.get('sha')
+        if not tree_sha:
+            return None
+
+        response = self.session.get(self.repo_url(f"git/trees/{tree_sha}"),
+                                    params={**params, "recursive": 1}, timeout=self.timeout)
+        if response.status_code != 200:
+            print(f"读取文件树失败: {response.status_code}")
+            return None
+
+        tree = response.json()
+        if tree.get('truncated'):
+            print("仓库文件树过大，无法一次读取")
+            return None
+        return {item['path']: item.get('sha') for item in tree.get('tree', []) if item.get('type') == 'blob'}
+
+    def commit_files(self, files):
+        """将多个文件合并为一次提交（只提交内容有变化的文件）
+
+        files: [(本地路径, 仓库中的文件名), ...]，同名文件以后面的为准
+        提交成功或所有文件都未变化时返回True，提交接口不可用或失败时返回False
+        """
+        contents = {}
+        for file_path, file_name in files:
+            with open(file_path, 'rb') as f:
+                contents[file_name] = f.read()
+
+        remote_tree = self.get_remote_tree()
+        if remote_tree is None:
+            return False
+
+        actions = []
+        for file_name, content in contents.items():
+            remote_sha = remote_tree.get(file_name)
+            if remote_sha == git_blob_sha(content):
+                print(f"文件内容未变化，跳过上传: {file_name}")
+                continue
+            actions.append({
+                "action": "update" if remote_sha else "create",
+                "path": file_name,
+                "content": base64.b64encode(content).decode('utf-8'),
+                "encoding": "base64"
+            })
+
+        if not actions:
+            return True
+
+        data = {
+            "access_token": self.access_token,
+            "branch": self.branch,
+            "message": self.commit_message(),
+            "actions": actions
+        }
+        response = self.session.post(self.repo_url("commits"), json=data, timeout=self.timeout)
+        if response.status_code not in [200, 201]:
+            print(f"批量提交失败: {response.status_code} - {response.text}")
+            return False
+
+        result = response.json()
+        html_url = result.get('html_url') if isinstance(result, dict) else None
+        print(f"成功提交 {len(actions)} 个文件到Gitee: {', '.join(action['path'] for action in actions)}")
+        if html_url:
+            print(f"提交地址: {html_url}")
+        return True
+
+    def upload_files(self, files):
+        """上传多个文件，全部成功或无需上传时返回True
+
+        gitee.batch_commit 启用时先尝试合并为一次提交，失败时改为逐个上传（逐个上传同样会跳过未变化的文件）
+        """
+        if not self.is_configured():
+            print("Gitee配置不完整，跳过上传")
+            return False
+
+        # 同名文件只上传一次（以后面的为准）
+        files = list({file_name: (file_path, file_name) for file_path, file_name in files}.values())
+        if len(files) > 1 and self.config.get_bool('gitee.batch_commit', True):
+            try:
+                if self.commit_files(files):
+                    return True
+                print("改为逐个上传文件")
+            except requests.Timeout:
+                print(f"连接Gitee超时（连接{self.timeout[0]:g}秒/读取{self.timeout[1]:g}秒），跳过上传")
+                return False
+            except Exception as e:
+                print(f"批量提交时出错: {e}，改为逐个上传文件")
+
+        success = True
+        for file_path, file_name in files:
+            if not self.upload_file(file_path, file_name):
+                success = False
+        return success
+
+    def get_remote_sha(self, file_name):
+        """查询远程文件的sha
+
+        返回 (是否查询成功, sha)，文件不存在时sha为None
+        """
+        params = {
+            "access_token": self.access_token,
+            "ref": self.branch
+        }
+        response = self.session.get(self.contents_url(file_name), params=params, timeout=self.timeout)
+
+        if response.status_code == 200:
+            file_info = response.json()
+            if isinstance(file_info, dict):
+                return True, file_info.get('sha')
+            if isinstance(file_info, list):
+                # 路径为目录或文件不存在时可能返回列表
+                base_name = file_name.rsplit('/', 1)[-1]
+                for item in file_info:
+                    if isinstance(item, dict) and item.get('name') == base_name:
+                        return True, item.get('sha')
+            return True, None
+        if response.status_code == 404:
+            return True, None
+
+        print(f"检查文件失败: {response.status_code} - {response.text}")
+        return False, None
+
+    def upload_file(self, file_path, file_name):
+        """上传文件到仓库（内容与远程相同时跳过），成功或无需上传时返回True"""
+        if not self.is_configured():
+            print("Gitee配置不完整，跳过上传")
+            return False
+
+        # 读取文件内容（按字节读取，数据文件可能是gzip压缩的）
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"读取文件失败: {e}")
+            return False
+
+        try:
+            ok, sha = self.get_remote_sha(file_name)
+            if not ok:
+                return False
+
+            if sha is None:
+                print(f"文件不存在，将创建新文件: {file_name}")
+            elif sha == git_blob_sha(content):
+                print(f"文件内容未变化，跳过上传: {file_name}")
+                return True
+            else:
+                print(f"文件已存在，将更新: {file_name}")
+
+            data = {
+                "access_token": self.access_token,
+                "message": self.commit_message(),
+                "content": base64.b64encode(content).decode('utf-8'),
+                "branch": self.branch
+            }
+            if sha:
+                data["sha"] = sha
+
+            response = self.session.put(self.contents_url(file_name), json=data, timeout=self.timeout)
+            if response.status_code not in [200, 201]:
+                print(f"上传文件失败: {response.status_code} - {response.text}")
+                return False
+
+            result = response.json()
+            if isinstance(result, dict):
+                content_info = result.get('content', {})
+                if isinstance(content_info, dict):
+                    html_url = content_info.get('html_url')
+                else:
+                    html_url = result.get('html_url')
+
+                if html_url:
+                    print(f"成功上传文件到Gitee: {html_url}")
+                else:
+                    print("成功上传文件到Gitee，但无法获取URL")
+            else:
+                print("上传成功")
+            return True
+
+        except requests.Timeout:
+            print(f"连接Gitee超时（连接{self.timeout[0]:g}秒/读取{self.timeout[1]:g}秒），跳过上传")
+            return False
+        except Exception as e:
+            print(f"上传到Gitee时出错: {e}")
+            return False
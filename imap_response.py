@@ -0,0 +1,159 @@
+import base64
+import quopri
+import re
+
+# 原子中允许出现的字符以外的分隔符
+ATOM_DELIMITERS = b' ()"{'
+LITERAL_PATTERN = re.compile(rb'\{(\d+)\}$')
+
+
+def _segments(data):
+    """将imaplib返回的FETCH数据展开为片段：bytes为响应文本，('literal', bytes)为字面量"""
+    for item in data:
+        if isinstance(item, tuple):
+            yield item[0]
+            yield ('literal', item[1])
+        elif item:
+            yield item
+
+
+def _tokenize(data):
+    """将FETCH响应拆分为记号：'(' ')'、字符串（str）、字面量（bytes）、NIL（None）"""
+    literal_expected = False
+    for segment in _segments(data):
+        if isinstance(segment, tuple):
+            if literal_expected:
+                yield segment[1]
+                literal_expected = False
+            continue
+
+        i = 0
+        length = len(segment)
+        while i < length:
+            c = segment[i:i + 1]
+            if c in (b' ', b'\r', b'\n'):
+                i += 1
+            elif c in (b'(', b')'):
+                yield c.decode('ascii')
+                i += 1
+            elif c == b'"':
+                j = i + 1
+                value = bytearray()
+                while j < length and segment[j:j + 1] != b'"':
+                    if segment[j:j + 1] == b'\\':
+                        j += 1
+                    value += segment[j:j + 1]
+                    j += 1
+                yield ('string', bytes(value).decode('utf-8', 'replace'))
+                i = j + 1
+            elif c == b'{':
+                # 字面量长度，内容为下一个片段
+                match = LITERAL_PATTERN.search(segment[i:])
+                if not match:
+                    raise ValueError(f"无法解析的FETCH响应: {segment[i:i + 40]!r}")
+                literal_expected = True
+                i = length
+            else:
+                # 原子，方括号内可以包含空格和括号（如 BODY[HEADER.FIELDS (SUBJECT FROM)]）
+                j = i
+                depth = 0
+                while j < length:
+                    ch = segment[j:j + 1]
+                    if ch == b'[':
+                        depth += 1
+                    elif ch == b']':
+                        depth -= 1
+                    elif depth == 0 and ch in ATOM_DELIMITERS:
+                        break
+                    j += 1
+                atom = segment[i:j].decode('ascii', 'replace')
+                yield None if atom.upper() == 'NIL' else atom
+                i = j
+
+
+def _parse_list(tokens):
+    """读取括号列表（左括号已读取）"""
+    items = []
+    for token in tokens:
+        if token == ')':
+            return items
+        if token == '(':
+            items.append(_parse_list(tokens))
+        elif isinstance(token, tuple):
+            items.append(token[1])
+        else:
+            items.append(token)
+    raise ValueError("FETCH响应不完整")
+
+
+def parse_fetch_response(data):
+    """解析 mail.uid('FETCH', ...) 返回的数据
+
+    返回每封邮件的数据项 [{名称: 值}]，名称为大写（如 UID、BODYSTRUCTURE、BODY[1]），
+    列表为嵌套的list，字符串为str，字面量为bytes，NIL为None
+    """
+    messages = []
+    tokens = _tokenize(data)
+    for token in tokens:
+        if token != '(':
+            # 邮件序号
+            continue
+        items = _parse_list(tokens)
+        messages.append({str(items[i]).upper(): items[i + 1] for i in range(0, len(items) - 1, 2)})
+    return messages
+
+
+def _text(value):
+    """BODYSTRUCTURE中的字符串（可能是字面量）转为小写str，NIL为空字符串"""
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    return str(value).lower()
+
+
+def find_text_part(structure, section=''):
+    """在BODYSTRUCTURE中查找第一个非附件的text/plain部分
+
+    返回 (部分编号, 传输编码, 字符集)，没有时返回None；单部分邮件的编号为 "1"
+    """
+    if not isinstance(structure, list) or not structure:
+        return None
+
+    if isinstance(structure[0], list):
+        # multipart：开头是各子部分，之后是子类型和扩展字段
+        for index, part in enumerate(structure, 1):
+            if not isinstance(part, list):
+                break
+            found = find_text_part(part, f"{section}.{index}" if section else str(index))
+            if found:
+                return found
+        return None
+
+    if len(structure) < 7:
+        return None
+    if _text(structure[0]) != 'text' or _text(structure[1]) != 'plain':
+        return None
+
+    # text部分的扩展字段：8 MD5，9 Content-Disposition
+    disposition = structure[9] if len(structure) > 9 else None
+    if isinstance(disposition, list) and disposition and _text(disposition[0]) == 'attachment':
+        return None
+
+    params = structure[2] if isinstance(structure[2], list) else []
+    charset = None
+    for i in range(0, len(params) - 1, 2):
+        if _text(params[i]) == 'charset':
+            charset = _text(params[i + 1]) or None
+    return section or '1', _text(structure[5]) or '7bit', charset
+
+
+def decode_part(payload, encoding, charset=None):
+    """按传输编码和字符集解码邮件部分的内容"""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    if encoding == 'base64':
+        payload = base64.b64decode(payload)
+    elif encoding == 'quoted-printable':
+        payload = quopri.decodestring(payload)
+    return payload.decode(charset or 'utf-8')
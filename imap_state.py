@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+from datetime import datetime
+from config_manager import ConfigManager
+
+class ImapState:
+    """邮件同步状态
+
+    按邮箱（多账号时按账号）记录邮箱的 UIDVALIDITY，以及每个日期的同步进度：
+        last_uid: 已经搜索过的最大UID（该日期UID不大于它的邮件都已检查过）
+        baah_uid: 已处理的BAAH结束邮件的UID
+        saved_date: 资源数据保存的日期
+    再次获取同一日期时只搜索UID更大的新邮件；UIDVALIDITY变化（UID不再有效）时清空记录，重新按日期搜索。
+    """
+
+    STATE_FILE_NAME = "imap_state.json"
+    # 每个邮箱最多保留的日期数（只保留最近的日期）
+    MAX_DAYS = 62
+
+    # 同一进程内多个线程同时更新状态时使用
+    _lock = threading.Lock()
+
+    def __init__(self, state_path=None):
+        self.config = ConfigManager()
+        self.state_path = state_path or self.get_state_path()
+
+    def get_state_path(self):
+        """邮件同步状态文件路径：数据目录下的 imap_state.json"""
+        return os.path.join(self.config.data_dir(), self.STATE_FILE_NAME)
+
+    def _load(self):
+        """读取状态文件，不存在或损坏时返回空状态"""
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except Exception as e:
+            print(f"读取邮件同步状态失败: {e}")
+            return {}
+
+    def _save(self, state):
+        """保存状态文件（先写临时文件再替换）"""
+        temp_path = self.state_path + ".tmp"
+        try:
+            folder = os.path.dirname(self.state_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.state_path)
+            return True
+        except Exception as e:
+            print(f"保存邮件同步状态失败: {e}")
+            return False
+
+    def get_day(self, mailbox_key, uidvalidity, date_str):
+        """获取某个日期的同步进度，没有记录或 UIDVALIDITY 已变化时返回None"""
+        if uidvalidity is None:
+            return None
+        mailbox = self._load().get(mailbox_key)
+        if not mailbox:
+            return None
+        if mailbox.get('uidvalidity') != uidvalidity:
+            print("邮箱的UIDVALIDITY已变化，之前记录的UID失效，重新按日期搜索")
+            return None
+        return mailbox.get('days', {}).get(date_str)
+
+    def update_day(self, mailbox_key, uidvalidity, date_str, last_uid, baah_uid=None, saved_date=None):
+        """记录某个日期的同步进度（baah_uid为None时保留之前处理的邮件）"""
+        if uidvalidity is None or last_uid is None:
+            return False
+
+        with self._lock:
+            state = self._load()
+            mailbox = state.get(mailbox_key)
+            if not mailbox or mailbox.get('uidvalidity') != uidvalidity:
+                mailbox = {'uidvalidity': uidvalidity, 'last_uid': 0, 'days': {}}
+
+            day = mailbox['days'].get(date_str, {})
+            day['last_uid'] = max(last_uid, day.get('last_uid', 0))
+            if baah_uid is not None:
+                day['baah_uid'] = baah_uid
+                day['saved_date'] = saved_date
+            mailbox['days'][date_str] = day
+            mailbox['last_uid'] = max(mailbox.get('last_uid', 0), day['last_uid'])
+            mailbox['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            # 只保留最近的日期
+            for old_date in sorted(mailbox['days'])[:-self.MAX_DAYS]:
+                del mailbox['days'][old_date]
+
+            state[mailbox_key] = mailbox
+            return self._save(state)
@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import re
+from config_manager import ConfigManager
+from resource_loader import loads, parse_files
+
+# 邮箱标识中不能用于文件夹名的字符
+UNSAFE_NAME_PATTERN = re.compile(r'[\\/:*?"<>|#\s]')
+
+
+class MessageCache:
+    """已读取的BAAH结束邮件正文的本地缓存
+
+    每个邮箱（多账号时每个账号）一个文件夹，每封邮件一个gzip压缩的JSON文件 {UIDVALIDITY}-{UID}.json.gz，
+    内容为 {"uidvalidity", "uid", "date": 搜索的日期, "target_date": 获取时指定的日期（YYMMDD或null）, "body": 正文}。
+    再次处理已缓存的邮件时不再读取正文；解析规则变化或资源文件被删除时，
+    可以通过 -reparse 不连接邮箱，直接从缓存重新生成资源文件
+    """
+
+    CACHE_FOLDER_NAME = "message_cache"
+    CACHE_SUFFIX = ".json.gz"
+
+    def __init__(self, mailbox_key, cache_folder=None):
+        self.config = ConfigManager()
+        self.mailbox_key = mailbox_key
+        self.cache_folder = cache_folder or self.get_cache_folder()
+
+    @staticmethod
+    def is_enabled(config=None):
+        """是否缓存邮件正文（email.message_cache，默认开启）"""
+        return (config or ConfigManager()).get_bool('email.message_cache', True)
+
+    def get_cache_folder(self):
+        """该邮箱的邮件正文缓存文件夹：数据目录下的 message_cache/<邮箱标识>"""
+        return os.path.join(self.config.data_dir(), self.CACHE_FOLDER_NAME,
+                            UNSAFE_NAME_PATTERN.sub('_', self.mailbox_key))
+
+    def get_message_path(self, uidvalidity, uid):
+        """邮件的缓存文件路径（服务器未返回UIDVALIDITY时记为0）"""
+        return os.path.join(self.cache_folder, f"{uidvalidity or 0}-{int(uid)}{self.CACHE_SUFFIX}")
+
+    def save(self, uidvalidity, uid, date_str, target_date, body):
+        """缓存邮件正文（先写临时文件再替换；gzip头不记录时间）"""
+        message = {
+            'uidvalidity': uidvalidity or 0,
+            'uid': int(uid),
+            'date': date_str,
+            'target_date': target_date,
+            'body': body
+        }
+        file_path = self.get_message_path(uidvalidity, uid)
+        temp_path = file_path + ".tmp"
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with open(temp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+            os.replace(temp_path, file_path)
+            return True
+        except Exception as e:
+            print(f"缓存邮件正文失败: {e}")
+            return False
+
+    def read_message(self, file_path):
+        """读取缓存文件"""
+        with gzip.open(file_path, 'rb') as f:
+            return loads(f.read())
+
+    def load(self, uidvalidity, uid):
+        """读取缓存的邮件正文，没有缓存时返回None"""
+        file_path = self.get_message_path(uidvalidity, uid)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            return self.read_message(file_path)['body']
+        except Exception as e:
+            print(f"读取缓存的邮件正文失败: {e}")
+            return None
+
+    def list_message_paths(self):
+        """所有缓存文件的路径"""
+        if not os.path.isdir(self.cache_folder):
+            return []
+        with os.scandir(self.cache_folder) as it:
+            return sorted(entry.path for entry in it
+                          if entry.name.endswith(self.CACHE_SUFFIX) and entry.is_file())
+
+    def latest_by_date(self, max_workers=None):
+        """每个日期最新的一封邮件（UIDVALIDITY、UID最大）：{日期: 缓存内容}"""
+        latest = {}
+        for _, message in parse_files(self.list_message_paths(), self.read_message, max_workers):
+            if not message:
+                continue
+            key = (message['uidvalidity'], message['uid'])
+            current = latest.get(message['date'])
+            if current is None or key > (current['uidvalidity'], current['uid']):
+                latest[message['date']] = message
+        return latest
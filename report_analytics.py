@@ -0,0 +1,559 @@
+from datetime import date, datetime, timedelta
+from report_models import ReductionRecord, WeeklySummary, MonthlySummary, by_datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+# auto模式下使用NumPy引擎的最少天数（数据量小时数组转换的开销大于收益）
+VECTORIZE_MIN_DAYS = 365
+
+# 报告页面提供的时间范围：(名称, 天数)，None表示全部数据
+RANGE_WINDOWS = (
+    ('week', 7),
+    ('month', 30),
+    ('quarter', 90),
+    ('year', 365),
+    ('all', None)
+)
+
+# 每日数据前缀和的字段（与页面统计卡片对应）
+DAILY_PREFIX_KEYS = (
+    'baah_diamond', 'net_diamond', 'baah_credit',
+    'positive_baah_diamond', 'positive_baah_diamond_days',
+    'positive_net_diamond', 'positive_net_diamond_days',
+    'positive_baah_credit', 'positive_baah_credit_days',
+    'positive_duration', 'positive_duration_days',
+    'reduction', 'reduction_days'
+)
+
+# 青辉石减少量前缀和的字段
+REDUCTION_PREFIX_KEYS = ('reduction', 'draws')
+
+# 1970-01-01 的 date.toordinal()，用于换算页面中 new Date('YYYY-MM-DD') 的时间戳
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class PeriodAccumulator:
+    """周/月分组的累加器"""
+
+    def __init__(self):
+        self.days_count = 0
+        self.total_baah_diamond = 0
+        self.total_net_diamond = 0
+        self.total_duration = 0
+        self.positive_baah_sum = 0
+        self.positive_baah_count = 0
+        self.positive_net_sum = 0
+        self.positive_net_count = 0
+        self.positive_duration_sum = 0
+        self.positive_duration_count = 0
+
+    def add(self, item):
+        """累加一天的数据"""
+        baah_gain = item.baah_diamond_gain
+        net_gain = item.net_diamond_gain
+        duration = item.duration_minutes
+
+        self.days_count += 1
+        self.total_baah_diamond += baah_gain
+        self.total_net_diamond += net_gain
+        self.total_duration += duration
+
+        # 过滤掉负数数据计算平均值
+        if baah_gain > 0:
+            self.positive_baah_sum += baah_gain
+            self.positive_baah_count += 1
+        if net_gain > 0:
+            self.positive_net_sum += net_gain
+            self.positive_net_count += 1
+        if duration > 0:
+            self.positive_duration_sum += duration
+            self.positive_duration_count += 1
+
+    def averages(self):
+        """返回(BAAH青辉石平均, 净青辉石平均, 平均时长)"""
+        avg_baah_diamond = (self.positive_baah_sum / self.positive_baah_count) if self.positive_baah_count else 0
+        avg_net_diamond = (self.positive_net_sum / self.positive_net_count) if self.positive_net_count else 0
+        avg_duration = (self.positive_duration_sum / self.positive_duration_count) if self.positive_duration_count else 0
+        return avg_baah_diamond, avg_net_diamond, avg_duration
+
+
+class ReportAnalytics:
+    """报告统计引擎
+
+    对按日期升序排列的每日数据只遍历一次，同时计算每日增益、周度和月度分组、
+    青辉石减少量以及总体统计，避免对同一份数据反复排序和过滤。
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @staticmethod
+    def _descending(items, key):
+        """将按key升序排列的列表转为降序，key相同的元素保持原有顺序（与sorted(reverse=True)一致）"""
+        result = []
+        end = len(items)
+        while end > 0:
+            start = end - 1
+            current_key = key(items[start])
+            while start > 0 and key(items[start - 1]) == current_key:
+                start -= 1
+            result.extend(items[start:end])
+            end = start
+        return result
+
+    def _weekly_item(self, week_start, acc):
+        """生成一周的报告数据"""
+        week_end = week_start + timedelta(days=6)
+        avg_baah_diamond, avg_net_diamond, avg_duration = acc.averages()
+        return WeeklySummary(
+            f"{week_start.strftime('%Y-%m-%d')} 至 {week_end.strftime('%Y-%m-%d')}",
+            week_start,
+            acc.days_count,
+            acc.total_baah_diamond,
+            acc.total_net_diamond,
+            avg_baah_diamond,
+            avg_net_diamond,
+            acc.total_duration,
+            avg_duration
+        )
+
+    def _monthly_item(self, year_month, acc):
+        """生成一个月的报告数据"""
+        year, month = year_month
+        avg_baah_diamond, avg_net_diamond, avg_duration = acc.averages()
+        return MonthlySummary(
+            f"{year}年{month:02d}月",
+            datetime(year, month, 1),
+            acc.days_count,
+            acc.total_baah_diamond,
+            acc.total_net_diamond,
+            avg_baah_diamond,
+            avg_net_diamond,
+            acc.total_duration,
+            avg_duration
+        )
+
+    def run(self):
+        """计算全部统计数据
+
+        返回字典:
+            daily: 每日数据（按日期降序，已补充增益字段）
+            weekly / monthly: 周度和月度报告（最近的在前）
+            reduction: 青辉石减少量数据（最近的在前）
+            summary: 总体统计信息
+        """
+        data = self.data
+        # 按日期升序排序（用于计算净增益），之后只遍历一次
+        data.sort(key=by_datetime)
+
+        weekly_data = []
+        monthly_data = []
+        reduction_data = []
+
+        week_key = None
+        week_acc = None
+        month_key = None
+        month_acc = None
+
+        total_baah_diamond_gain = 0
+        total_net_diamond_gain = 0
+        total_baah_credit_gain = 0
+        total_net_credit_gain = 0
+        positive_baah_sum = positive_baah_count = 0
+        positive_net_sum = positive_net_count = 0
+        positive_credit_sum = positive_credit_count = 0
+        positive_duration_sum = positive_duration_count = 0
+        total_diamond_reduction = 0
+        total_draws = 0
+
+        previous = None
+        for item in data:
+            # BAAH增益：今天的结束减去今天的开始
+            item.baah_diamond_gain = item.end_diamond - item.start_diamond
+            item.baah_credit_gain = item.end_credit - item.start_credit
+
+            # 净增益：今天减去上一天结束（第一天没有前一天，净增益等于BAAH增益）
+            if previous is None:
+                item.net_diamond_gain = item.baah_diamond_gain
+                item.net_credit_gain = item.baah_credit_gain
+            else:
+                item.net_diamond_gain = item.end_diamond - previous.end_diamond
+                item.net_credit_gain = item.end_credit - previous.end_credit
+
+                # 青辉石减少量：前一天结束减去今天开始，只计入正值
+                reduction = previous.end_diamond - item.start_diamond
+                if reduction > 0:
+                    draws = reduction // 120  # 计算对应的抽卡次数
+                    reduction_data.append(ReductionRecord(item.date, item.start_diamond, previous.end_diamond,
+                                                          reduction, draws, item.datetime))
+                    total_diamond_reduction += reduction
+                    total_draws += draws
+
+            # 周度分组（周一到周日），数据按日期升序，同一周的数据是连续的
+            day = item.datetime
+            week_start = day - timedelta(days=day.weekday())
+            if week_start != week_key:
+                if week_acc is not None:
+                    weekly_data.append(self._weekly_item(week_key, week_acc))
+                week_key = week_start
+                week_acc = PeriodAccumulator()
+            week_acc.add(item)
+
+            # 月度分组
+            year_month = (day.year, day.month)
+            if year_month != month_key:
+                if month_acc is not None:
+                    monthly_data.append(self._monthly_item(month_key, month_acc))
+                month_key = year_month
+                month_acc = PeriodAccumulator()
+            month_acc.add(item)
+
+            # 总体统计
+            total_baah_diamond_gain += item.baah_diamond_gain
+            total_net_diamond_gain += item.net_diamond_gain
+            total_baah_credit_gain += item.baah_credit_gain
+            total_net_credit_gain += item.net_credit_gain
+
+            # 过滤掉负数数据计算平均值
+            if item.baah_diamond_gain > 0:
+                positive_baah_sum += item.baah_diamond_gain
+                positive_baah_count += 1
+            if item.net_diamond_gain > 0:
+                positive_net_sum += item.net_diamond_gain
+                positive_net_count += 1
+            if item.baah_credit_gain > 0:
+                positive_credit_sum += item.baah_credit_gain
+                positive_credit_count += 1
+            if item.duration_minutes > 0:
+                positive_duration_sum += item.duration_minutes
+                positive_duration_count += 1
+
+            previous = item
+
+        if week_acc is not None:
+            weekly_data.append(self._weekly_item(week_key, week_acc))
+        if month_acc is not None:
+            monthly_data.append(self._monthly_item(month_key, month_acc))
+
+        totals = {
+            'total_diamond_reduction': total_diamond_reduction,
+            'total_draws': total_draws,
+            'total_baah_diamond_gain': total_baah_diamond_gain,
+            'total_net_diamond_gain': total_net_diamond_gain,
+            'total_baah_credit_gain': total_baah_credit_gain,
+            'total_net_credit_gain': total_net_credit_gain,
+            'avg_baah_diamond_per_day': (positive_baah_sum / positive_baah_count) if positive_baah_count else 0,
+            'avg_net_diamond_per_day': (positive_net_sum / positive_net_count) if positive_net_count else 0,
+            'avg_baah_credit_per_day': (positive_credit_sum / positive_credit_count) if positive_credit_count else 0,
+            'avg_duration_per_day': (positive_duration_sum / positive_duration_count) if positive_duration_count else 0
+        }
+
+        # 按日期降序排列（最近的在前）
+        daily_data = self._descending(data, key=by_datetime)
+        weekly_data.reverse()
+        monthly_data.reverse()
+        reduction_data = self._descending(reduction_data, key=by_datetime)
+
+        return self._build_result(daily_data, weekly_data, monthly_data, reduction_data, totals)
+
+    def _build_result(self, daily_data, weekly_data, monthly_data, reduction_data, totals):
+        """组装统计结果（各列表均为最近的在前）"""
+        summary = {
+            'total_days': len(daily_data),
+            # 当前总抽卡次数（基于最近一天的结束青辉石）
+            'current_total_draws': int(daily_data[0].end_diamond // 120) if daily_data else 0,
+            'reduction_days': len(reduction_data),
+            **totals,
+            # 计算总抽卡次数（基于净青辉石获得）
+            'total_net_draws': totals['total_net_diamond_gain'] // 120
+        }
+
+        return {
+            'daily': daily_data,
+            'weekly': weekly_data,
+            'monthly': monthly_data,
+            'reduction': reduction_data,
+            'summary': summary
+        }
+
+
+class VectorizedReportAnalytics(ReportAnalytics):
+    """基于NumPy的报告统计引擎
+
+    将开始/结束青辉石、信用点和任务时长载入列数组，增益、周/月分组（datetime64）、
+    正值平均和青辉石减少量都通过数组运算完成，结果与 ReportAnalytics 完全一致。
+    浮点数求和使用 np.bincount（按顺序累加），保证与逐项相加的结果相同。
+    """
+
+    # date.toordinal() 与 datetime64[D]（1970-01-01为0）之间的偏移
+    EPOCH_ORDINAL = EPOCH_ORDINAL
+
+    @staticmethod
+    def is_available():
+        """是否安装了NumPy"""
+        return np is not None
+
+    def _load_columns(self):
+        """将每日数据载入列数组，资源值不全为整数时返回None"""
+        data = self.data
+        columns = {}
+        for key in ('start_diamond', 'end_diamond', 'start_credit', 'end_credit'):
+            values = [getattr(item, key) for item in data]
+            # 资源值可能是浮点数，此时交给纯Python引擎以保证输出格式一致
+            if not all(type(value) is int for value in values):
+                return None
+            columns[key] = np.array(values, dtype=np.int64)
+        columns['duration_minutes'] = np.array([item.duration_minutes for item in data], dtype=np.float64)
+        columns['days'] = np.array([item.datetime.toordinal() for item in data], dtype=np.int64) - self.EPOCH_ORDINAL
+        return columns
+
+    @staticmethod
+    def _group_ids(keys):
+        """为已排序的分组键生成分组编号和每组起始位置"""
+        starts = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], starts))
+        group_ids = np.zeros(len(keys), dtype=np.int64)
+        group_ids[starts[1:]] = 1
+        return np.cumsum(group_ids), starts
+
+    @staticmethod
+    def _period_accumulators(group_ids, starts, baah_gain, net_gain, duration):
+        """按分组计算累加结果"""
+        group_count = len(starts)
+        days_count = np.bincount(group_ids, minlength=group_count)
+        total_baah = np.add.reduceat(baah_gain, starts)
+        total_net = np.add.reduceat(net_gain, starts)
+        total_duration = np.bincount(group_ids, weights=duration, minlength=group_count)
+
+        positive_baah = baah_gain > 0
+        positive_net = net_gain > 0
+        positive_duration = duration > 0
+        positive_baah_sum = np.add.reduceat(np.where(positive_baah, baah_gain, 0), starts)
+        positive_net_sum = np.add.reduceat(np.where(positive_net, net_gain, 0), starts)
+        positive_duration_sum = np.bincount(group_ids, weights=np.where(positive_duration, duration, 0.0),
+                                            minlength=group_count)
+        positive_baah_count = np.bincount(group_ids, weights=positive_baah, minlength=group_count)
+        positive_net_count = np.bincount(group_ids, weights=positive_net, minlength=group_count)
+        positive_duration_count = np.bincount(group_ids, weights=positive_duration, minlength=group_count)
+
+        accumulators = []
+        for i in range(group_count):
+            acc = PeriodAccumulator()
+            acc.days_count = int(days_count[i])
+            acc.total_baah_diamond = int(total_baah[i])
+            acc.total_net_diamond = int(total_net[i])
+            acc.total_duration = float(total_duration[i])
+            acc.positive_baah_sum = int(positive_baah_sum[i])
+            acc.positive_baah_count = int(positive_baah_count[i])
+            acc.positive_net_sum = int(positive_net_sum[i])
+            acc.positive_net_count = int(positive_net_count[i])
+            acc.positive_duration_sum = float(positive_duration_sum[i])
+            acc.positive_duration_count = int(positive_duration_count[i])
+            accumulators.append(acc)
+        return accumulators
+
+    @staticmethod
+    def _positive_average(values):
+        """正值平均（没有正值时为0）"""
+        positive = values > 0
+        count = int(np.count_nonzero(positive))
+        if not count:
+            return 0
+        if values.dtype == np.float64:
+            # 按顺序累加，与逐项相加的结果一致
+            total = float(np.bincount(np.zeros(len(values), dtype=np.int64), weights=np.where(positive, values, 0.0))[0])
+        else:
+            total = int(values[positive].sum())
+        return total / count
+
+    def run(self):
+        """计算全部统计数据（返回格式与 ReportAnalytics.run 相同）"""
+        if not self.data:
+            return super().run()
+
+        columns = self._load_columns()
+        if columns is None:
+            return super().run()
+
+        # 按日期升序稳定排序
+        order = np.argsort(columns['days'], kind='stable')
+        data = [self.data[i] for i in order]
+        self.data[:] = data
+        days = columns['days'][order]
+        start_diamond = columns['start_diamond'][order]
+        end_diamond = columns['end_diamond'][order]
+        start_credit = columns['start_credit'][order]
+        end_credit = columns['end_credit'][order]
+        duration = columns['duration_minutes'][order]
+
+        # BAAH增益和净增益（第一天净增益等于BAAH增益）
+        baah_diamond_gain = end_diamond - start_diamond
+        baah_credit_gain = end_credit - start_credit
+        net_diamond_gain = baah_diamond_gain.copy()
+        net_credit_gain = baah_credit_gain.copy()
+        net_diamond_gain[1:] = end_diamond[1:] - end_diamond[:-1]
+        net_credit_gain[1:] = end_credit[1:] - end_credit[:-1]
+
+        gain_columns = zip(baah_diamond_gain.tolist(), baah_credit_gain.tolist(),
+                           net_diamond_gain.tolist(), net_credit_gain.tolist())
+        for item, (baah_diamond, baah_credit, net_diamond, net_credit) in zip(data, gain_columns):
+            item.baah_diamond_gain = baah_diamond
+            item.baah_credit_gain = baah_credit
+            item.net_diamond_gain = net_diamond
+            item.net_credit_gain = net_credit
+
+        # 周度分组（周一为一周开始，1970-01-01为周四）
+        week_keys = days - (days + 3) % 7
+        week_ids, week_starts = self._group_ids(week_keys)
+        week_accs = self._period_accumulators(week_ids, week_starts, baah_diamond_gain, net_diamond_gain, duration)
+        weekly_data = [
+            self._weekly_item(date.fromordinal(int(week_keys[start]) + self.EPOCH_ORDINAL), acc)
+            for start, acc in zip(week_starts, week_accs)
+        ]
+
+        # 月度分组（datetime64[M]为自1970-01起的月数）
+        month_keys = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        month_ids, month_starts = self._group_ids(month_keys)
+        month_accs = self._period_accumulators(month_ids, month_starts, baah_diamond_gain, net_diamond_gain, duration)
+        monthly_data = [
+            self._monthly_item((1970 + year_offset, month + 1), acc)
+            for (year_offset, month), acc in zip(
+                (divmod(int(month_keys[start]), 12) for start in month_starts), month_accs)
+        ]
+
+        # 青辉石减少量：前一天结束减去今天开始，只计入正值
+        reductions = end_diamond[:-1] - start_diamond[1:]
+        reduction_positions = np.flatnonzero(reductions > 0)
+        reduction_values = reductions[reduction_positions]
+        draws_values = reduction_values // 120
+        reduction_data = []
+        for position, reduction, draws in zip(reduction_positions.tolist(), reduction_values.tolist(),
+                                              draws_values.tolist()):
+            current_day = data[position + 1]
+            reduction_data.append(ReductionRecord(current_day.date, current_day.start_diamond,
+                                                  data[position].end_diamond, reduction, draws,
+                                                  current_day.datetime))
+
+        totals = {
+            'total_diamond_reduction': int(reduction_values.sum()),
+            'total_draws': int(draws_values.sum()),
+            'total_baah_diamond_gain': int(baah_diamond_gain.sum()),
+            'total_net_diamond_gain': int(net_diamond_gain.sum()),
+            'total_baah_credit_gain': int(baah_credit_gain.sum()),
+            'total_net_credit_gain': int(net_credit_gain.sum()),
+            'avg_baah_diamond_per_day': self._positive_average(baah_diamond_gain),
+            'avg_net_diamond_per_day': self._positive_average(net_diamond_gain),
+            'avg_baah_credit_per_day': self._positive_average(baah_credit_gain),
+            'avg_duration_per_day': self._positive_average(duration)
+        }
+
+        # 按日期降序排列（最近的在前，同一天的数据保持原有顺序）
+        descending = np.argsort(-days, kind='stable')
+        daily_data = [data[i] for i in descending]
+        weekly_data.reverse()
+        monthly_data.reverse()
+        reduction_data = self._descending(reduction_data, key=by_datetime)
+
+        return self._build_result(daily_data, weekly_data, monthly_data, reduction_data, totals)
+
+
+def _prefix_sums(items, keys, values):
+    """按列表顺序计算前缀和，values(item) 返回与keys对应的值，结果中第k项为前k个元素之和"""
+    prefix = {key: [0] for key in keys}
+    columns = [prefix[key] for key in keys]
+    for item in items:
+        for column, value in zip(columns, values(item)):
+            column.append(column[-1] + value)
+    return prefix
+
+
+def _count_since(items, cutoff_ms):
+    """降序列表中日期不早于截止时间的元素个数（即页面中 new Date(datetime) >= cutoff 的条数）"""
+    count = 0
+    for item in items:
+        if (item.datetime.toordinal() - EPOCH_ORDINAL) * DAY_MS < cutoff_ms:
+            break
+        count += 1
+    return count
+
+
+def build_range_summaries(daily_data, reduction_data, now=None):
+    """预计算报告页面时间范围过滤所需的统计数据
+
+    daily_data 和 reduction_data 为 ReportAnalytics 的结果（最近的在前），
+    任意"最近k条"的统计都等于前缀和数组的第k项，页面切换范围时只需二分查找k并直接取值。
+    另外按生成时间为每个时间范围预先算好统计块，页面中k与统计块一致时直接使用。
+
+    返回字典:
+        daily_prefix / reduction_prefix: 各字段的前缀和数组（长度为条数+1）
+        windows: {范围名称: {days, daily: {count, 各字段合计}, reduction: {count, 各字段合计}}}
+    """
+    def daily_values(pair):
+        index, item = pair
+        baah_diamond = item.baah_diamond_gain
+        net_diamond = item.net_diamond_gain
+        baah_credit = item.baah_credit_gain
+        duration = item.duration_minutes
+
+        # 青辉石减少量：本条（较早的一天）结束减去前一条（较晚的一天）开始
+        # 前k条中相邻的k-1对都计入第k项，第一条没有前一条，记为0
+        reduction = 0
+        if index > 0:
+            reduction = item.end_diamond - daily_data[index - 1].start_diamond
+        return (
+            baah_diamond, net_diamond, baah_credit,
+            baah_diamond if baah_diamond > 0 else 0, 1 if baah_diamond > 0 else 0,
+            net_diamond if net_diamond > 0 else 0, 1 if net_diamond > 0 else 0,
+            baah_credit if baah_credit > 0 else 0, 1 if baah_credit > 0 else 0,
+            duration if duration > 0 else 0, 1 if duration > 0 else 0,
+            reduction if reduction > 0 else 0, 1 if reduction > 0 else 0
+        )
+
+    daily_prefix = _prefix_sums(enumerate(daily_data), DAILY_PREFIX_KEYS, daily_values)
+    reduction_prefix = _prefix_sums(reduction_data, REDUCTION_PREFIX_KEYS,
+                                    lambda item: (item.reduction, item.draws))
+
+    now_ms = int((now or datetime.now()).timestamp() * 1000)
+    windows = {}
+    for name, days in RANGE_WINDOWS:
+        if days is None:
+            daily_count = len(daily_data)
+            reduction_count = len(reduction_data)
+        else:
+            cutoff_ms = now_ms - days * DAY_MS
+            daily_count = _count_since(daily_data, cutoff_ms)
+            reduction_count = _count_since(reduction_data, cutoff_ms)
+
+        windows[name] = {
+            'days': days,
+            'daily': {'count': daily_count,
+                      **{key: daily_prefix[key][daily_count] for key in DAILY_PREFIX_KEYS}},
+            'reduction': {'count': reduction_count,
+                          **{key: reduction_prefix[key][reduction_count] for key in REDUCTION_PREFIX_KEYS}}
+        }
+
+    return {
+        'daily_prefix': daily_prefix,
+        'reduction_prefix': reduction_prefix,
+        'windows': windows
+    }
+
+
+def create_report_analytics(data, backend='auto'):
+    """根据配置选择统计引擎
+
+    backend: auto（安装了NumPy且数据量较大时使用向量化引擎）、numpy、python
+    """
+    if backend == 'numpy' and not VectorizedReportAnalytics.is_available():
+        print("未安装NumPy，使用纯Python统计引擎")
+        backend = 'python'
+    elif backend == 'auto':
+        use_numpy = VectorizedReportAnalytics.is_available() and len(data) >= VECTORIZE_MIN_DAYS
+        backend = 'numpy' if use_numpy else 'python'
+
+    if backend == 'numpy':
+        return VectorizedReportAnalytics(data)
+    return ReportAnalytics(data)
@@ -0,0 +1,142 @@
+import os
+import time
+from config_manager import ConfigManager
+from report_generator import ReportGenerator
+from resource_store import ResourceStore
+from accounts import get_accounts, MultiAccountReporter, run_account_generator
+from upload_queue import UploadQueue
+
+
+class ReportDaemon:
+    """常驻的报告生成进程（ba.py -reportd）
+
+    每个账号保留一个报告生成器，已解析的每日数据和编译后的模板都留在内存中。
+    定时扫描资源文件夹（SQLite存储时检查数据库文件），发现新增、修改或删除的资源文件后立即重新生成报告并加入上传队列，
+    不必每次都重新启动程序、导入模块和读取全部数据。
+    修改配置文件后需要重新启动。
+    """
+
+    DEFAULT_POLL_INTERVAL = 0.5
+    DEFAULT_SETTLE_SECONDS = 0.2
+    # 文件持续变化时最多等待的次数（之后直接生成，下次扫描时再更新）
+    MAX_SETTLE_ROUNDS = 10
+
+    def __init__(self):
+        self.config = ConfigManager()
+        self.accounts = get_accounts()
+        if self.accounts:
+            self.reporter = MultiAccountReporter(self.accounts)
+            self.generators = [ReportGenerator(account) for account in self.accounts]
+        else:
+            self.reporter = None
+            self.generators = [ReportGenerator()]
+        self.watch_paths = self.get_watch_paths()
+        self.upload_thread = None
+        self.upload_pending = False
+
+    def get_watch_paths(self):
+        """需要监视的路径：(路径, 是否为资源文件夹)，SQLite存储时为数据库文件及其WAL文件"""
+        paths = []
+        for generator in self.generators:
+            if ResourceStore.is_enabled(generator.config):
+                db_path = ResourceStore(config=generator.config).db_path
+                paths.append((db_path, False))
+                paths.append((db_path + '-wal', False))
+            else:
+                paths.append((generator.config.get('file_paths.resources_folder'), True))
+            paths.append((generator.get_template_path(), False))
+        # 各账号共用的模板只监视一次
+        return list(dict.fromkeys(paths))
+
+    def snapshot(self):
+        """当前资源文件的状态：{路径: (修改时间, 大小)}"""
+        state = {}
+        for path, is_folder in self.watch_paths:
+            try:
+                if not is_folder:
+                    stat = os.stat(path)
+                    state[path] = (stat.st_mtime_ns, stat.st_size)
+                    continue
+                with os.scandir(path) as it:
+                    for entry in it:
+                        # 与资源索引一致：跳过隐藏文件和临时文件
+                        if entry.name.startswith('.') or not entry.name.endswith('.json'):
+                            continue
+                        stat = entry.stat()
+                        state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+        return state
+
+    def wait_until_settled(self, state):
+        """等待文件写入完成（连续两次扫描结果相同），返回最新状态"""
+        settle_seconds = self.config.get_number('report_daemon.settle_seconds', self.DEFAULT_SETTLE_SECONDS)
+        for _ in range(self.MAX_SETTLE_ROUNDS):
+            time.sleep(settle_seconds)
+            new_state = self.snapshot()
+            if new_state == state:
+                break
+            state = new_state
+        return state
+
+    def generate(self, force=False):
+        """生成报告并加入上传队列（数据未变化时跳过）"""
+        start = time.time()
+        if self.reporter:
+            results = [run_account_generator(generator, force) for generator in self.generators]
+            published = self.reporter.publish(results) is not None
+        else:
+            generator = self.generators[0]
+            html_file = generator.process_baah_data(force)
+            published = html_file is not None
+            if published:
+                generator.publish_report(html_file)
+
+        if published:
+            print(f"报告已更新，用时 {time.time() - start:.2f} 秒")
+            self.upload_pending = True
+            self.start_upload_worker()
+
+    def start_upload_worker(self):
+        """启动上传线程；上一次的上传线程仍在运行时，等它结束后的下一次扫描再启动"""
+        if self.upload_thread is not None and self.upload_thread.is_alive():
+            return
+        self.upload_pending = False
+        self.upload_thread = UploadQueue().start_worker()
+
+    def run(self):
+        """启动常驻进程，按 Ctrl+C 停止"""
+        poll_interval = self.config.get_number('report_daemon.poll_interval', self.DEFAULT_POLL_INTERVAL)
+        print(f"监视资源数据变化（每{poll_interval:g}秒扫描一次），按 Ctrl+C 停止")
+        for path, _ in self.watch_paths:
+            print(f"  {path}")
+
+        # 启动时先上传队列中未完成的报告，再按当前数据生成一次（数据未变化时跳过）
+        self.start_upload_worker()
+        state = self.snapshot()
+        try:
+            try:
+                self.generate()
+            except Exception as e:
+                print(f"生成报告时出错: {e}")
+
+            while True:
+                time.sleep(poll_interval)
+                if self.upload_pending:
+                    self.start_upload_worker()
+
+                new_state = self.snapshot()
+                if new_state == state:
+                    continue
+
+                state = self.wait_until_settled(new_state)
+                print(f"\n[{time.strftime('%Y-%m-%d %H:%M:%S')}] 检测到资源数据变化，重新生成报告")
+                try:
+                    self.generate()
+                except Exception as e:
+                    print(f"生成报告时出错: {e}")
+        except KeyboardInterrupt:
+            print("\n报告常驻进程已停止")
+            if self.upload_thread is not None and self.upload_thread.is_alive():
+                print("等待上传完成...")
+                UploadQueue().wait_workers([self.upload_thread])
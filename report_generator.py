@@ -1,14 +1,56 @@
 import json
 import os
-import glob
-from datetime import datetime, timedelta
-import base64
-import requests
+import gzip
+from datetime import datetime
+import hashlib
+from operator import attrgetter
 from config_manager import ConfigManager
+from resource_index import ResourceIndex
+from resource_archive import ResourceArchive
+from resource_store import ResourceStore
+from resource_loader import load_json_file, parse_timestamp, get_max_workers
+from report_models import DailyRecord
+from report_analytics import create_report_analytics, build_range_summaries
+from template_renderer import load_template
+from report_state import ReportState
+from gitee_client import GiteeClient
+from upload_queue import UploadQueue
+
+# 报告内容指纹的版本号（报告格式变化时递增，使之前记录的指纹失效）
+FINGERPRINT_VERSION = 1
+
+# 可以通过 report.strip_sections 去除的报告区块（模板中的 <!-- section:名称 --> 标记）
+OPTIONAL_SECTIONS = ('weekly', 'monthly', 'reduction')
+
+# 影响报告内容或上传位置的配置项，变化时需要重新生成和上传
+FINGERPRINT_CONFIG_KEYS = (
+    'report.data_mode',
+    'report.sidecar_gzip',
+    'report.minify',
+    'report.strip_sections',
+    'gitee.enabled',
+    'gitee.owner',
+    'gitee.repo',
+    'gitee.branch'
+)
+
+# 仓库中报告的文件名（不含后缀）；数据文件在本地和仓库中都使用这个名字，页面按相对路径加载
+REPORT_NAME = "baah_task_report"
+
+# 报告数据文件的后缀：未压缩、gzip压缩
+SIDECAR_SUFFIXES = ('.data.json', '.data.json.gz')
 
 class ReportGenerator:
-    def __init__(self):
-        self.config = ConfigManager()
+    def __init__(self, account=None):
+        # account为AccountConfig时，资源数据、报告路径和上传位置都按账号分区
+        self.account = account
+        self.config = account or ConfigManager()
+        # 最近一次生成报告的总体统计（多账号汇总页使用）
+        self.last_summary = None
+        # 最近一次读取的数据的内容指纹
+        self.last_fingerprint = None
+        # 资源索引（同一个生成器多次生成报告时，已解析的每日数据保留在内存中）
+        self.resource_index = None
     
     def parse_resource_value(self, value_str):
         """解析资源字符串为数值"""
@@ -21,484 +63,369 @@ class ReportGenerator:
             return int(cleaned)
         return 0
     
-    def calculate_weekly_report(self, data):
-        """计算周度报告数据"""
-        # 按周分组（周一到周日）
-        weekly_groups = {}
-        
-        for item in data:
-            # 计算周开始日期（周一）
-            days_since_monday = item['datetime'].weekday()
-            week_start = item['datetime'] - timedelta(days=days_since_monday)
-            
-            if week_start not in weekly_groups:
-                weekly_groups[week_start] = []
-            weekly_groups[week_start].append(item)
+    def parse_resource_file(self, file_path):
+        """解析单个资源文件为每日数据"""
+        file_data = load_json_file(file_path)
         
-        weekly_data = []
-        for week_start, week_group in weekly_groups.items():
-            week_end = week_start + timedelta(days=6)
-            days_in_week = len(week_group)
-            
-            # 过滤掉负数数据计算平均值
-            positive_baah_days = [item for item in week_group if item['baah_diamond_gain'] > 0]
-            positive_net_days = [item for item in week_group if item['net_diamond_gain'] > 0]
-            positive_duration_days = [item for item in week_group if item['duration_minutes'] > 0]
-            
-            avg_baah_diamond = (sum(item['baah_diamond_gain'] for item in positive_baah_days) / 
-                                len(positive_baah_days)) if positive_baah_days else 0
-            avg_net_diamond = (sum(item['net_diamond_gain'] for item in positive_net_days) / 
-                              len(positive_net_days)) if positive_net_days else 0
-            avg_duration = (sum(item['duration_minutes'] for item in positive_duration_days) / 
-                           len(positive_duration_days)) if positive_duration_days else 0
-            
-            weekly_data.append({
-                'week_range': f"{week_start.strftime('%Y-%m-%d')} 至 {week_end.strftime('%Y-%m-%d')}",
-                'week_start': week_start,
-                'days_count': days_in_week,
-                'total_baah_diamond': sum(item['baah_diamond_gain'] for item in week_group),
-                'total_net_diamond': sum(item['net_diamond_gain'] for item in week_group),
-                'avg_baah_diamond': avg_baah_diamond,
-                'avg_net_diamond': avg_net_diamond,
-                'total_duration': sum(item['duration_minutes'] for item in week_group),
-                'avg_duration': avg_duration
-            })
-        
-        # 按周开始时间降序排序（最近的在前）
-        weekly_data.sort(key=lambda x: x['week_start'], reverse=True)
-        return weekly_data
+        # 提取日期作为文件名
+        date_str = os.path.basename(file_path).replace('.json', '')
+        return self.parse_resource_data(date_str, file_data)
     
-    def calculate_monthly_report(self, data):
-        """计算月度报告数据"""
-        # 按月分组
-        monthly_groups = {}
-        
-        for item in data:
-            # 生成年月键
-            year_month = f"{item['datetime'].year}-{item['datetime'].month:02d}"
-            
-            if year_month not in monthly_groups:
-                monthly_groups[year_month] = []
-            monthly_groups[year_month].append(item)
+    def parse_resource_archive(self, archive_path):
+        """解析月度归档为每日数据列表（无法解析的日期跳过）"""
+        data = []
+        archive = ResourceArchive(self.config.get('file_paths.resources_folder'))
+        for date_str, file_data in archive.read_archive(archive_path):
+            try:
+                data.append(self.parse_resource_data(date_str, file_data))
+            except Exception as e:
+                print(f"处理归档 {archive_path} 中 {date_str} 的数据时出错: {e}")
+        return data
+    
+    def parse_resource_data(self, date_str, file_data):
+        """将一天的资源数据（JSON文件内容格式）解析为每日数据"""
+        # 解析开始和结束时间
+        start_time = parse_timestamp(file_data['start_time'])
+        end_time = parse_timestamp(file_data['end_time'])
+        
+        # 计算任务时长（分钟）
+        duration_minutes = (end_time - start_time).total_seconds() / 60
+        
+        # 解析资源值
+        start_diamond = self.parse_resource_value(file_data['start_resource'].get('diamond', 0))
+        end_diamond = self.parse_resource_value(file_data['end_resource'].get('diamond', 0))
+        
+        start_credit = self.parse_resource_value(file_data['start_resource'].get('credit', 0))
+        end_credit = self.parse_resource_value(file_data['end_resource'].get('credit', 0))
+        
+        return DailyRecord(
+            date_str,
+            start_time.date(),
+            file_data['start_time'],
+            file_data['end_time'],
+            duration_minutes,
+            start_diamond,
+            end_diamond,
+            start_credit,
+            end_credit
+        )
+    
+    def load_daily_records(self):
+        """读取每日数据（SQLite存储按日期范围查询，JSON存储通过索引只解析新增或变化的文件和月度归档）"""
+        if ResourceStore.is_enabled(self.config):
+            data = []
+            for date_str, file_data in ResourceStore(config=self.config).query_range():
+                try:
+                    data.append(self.parse_resource_data(date_str, file_data))
+                except Exception as e:
+                    print(f"处理 {date_str} 的数据时出错: {e}")
+            return data
         
-        monthly_data = []
-        for year_month, month_group in monthly_groups.items():
-            days_in_month = len(month_group)
-            
-            # 解析年月
-            year, month = map(int, year_month.split('-'))
-            
-            # 过滤掉负数数据计算平均值
-            positive_baah_days = [item for item in month_group if item['baah_diamond_gain'] > 0]
-            positive_net_days = [item for item in month_group if item['net_diamond_gain'] > 0]
-            positive_duration_days = [item for item in month_group if item['duration_minutes'] > 0]
-            
-            avg_baah_diamond = (sum(item['baah_diamond_gain'] for item in positive_baah_days) / 
-                                len(positive_baah_days)) if positive_baah_days else 0
-            avg_net_diamond = (sum(item['net_diamond_gain'] for item in positive_net_days) / 
-                              len(positive_net_days)) if positive_net_days else 0
-            avg_duration = (sum(item['duration_minutes'] for item in positive_duration_days) / 
-                           len(positive_duration_days)) if positive_duration_days else 0
-            
-            monthly_data.append({
-                'month': f"{year}年{month:02d}月",
-                'month_start': datetime(year, month, 1),
-                'days_count': days_in_month,
-                'total_baah_diamond': sum(item['baah_diamond_gain'] for item in month_group),
-                'total_net_diamond': sum(item['net_diamond_gain'] for item in month_group),
-                'avg_baah_diamond': avg_baah_diamond,
-                'avg_net_diamond': avg_net_diamond,
-                'total_duration': sum(item['duration_minutes'] for item in month_group),
-                'avg_duration': avg_duration
-            })
+        folder_path = self.config.get('file_paths.resources_folder')
+        if not folder_path or not os.path.isdir(folder_path):
+            return []
         
-        # 按月份降序排序（最近的在前）
-        monthly_data.sort(key=lambda x: x['month_start'], reverse=True)
-        return monthly_data
+        if self.resource_index is None or self.resource_index.folder_path != folder_path:
+            self.resource_index = ResourceIndex(folder_path)
+        return self.resource_index.load_records(self.parse_resource_file, get_max_workers(self.config),
+                                                self.parse_resource_archive)
+    
+    def compute_fingerprint(self, data):
+        """计算报告内容指纹：每日数据、模板内容、相关配置和上传位置"""
+        hasher = hashlib.sha256()
+        hasher.update(f"v{FINGERPRINT_VERSION}\n".encode('utf-8'))
+        hasher.update(load_template(self.get_template_path()).source_hash.encode('utf-8'))
+        
+        settings = {key: self.config.get(key) for key in FINGERPRINT_CONFIG_KEYS}
+        settings['remote_prefix'] = self.get_remote_prefix()
+        hasher.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+        
+        # 读取顺序与文件系统有关，按日期排序后再计算
+        for record in sorted(data, key=lambda x: x.date):
+            hasher.update(b'\n')
+            hasher.update(json.dumps(record.to_dict(), sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+        return hasher.hexdigest()
     
-    def calculate_diamond_reduction(self, data):
-        """计算青辉石减少量数据"""
-        # 按日期升序排序
-        data_sorted = sorted(data, key=lambda x: x['datetime'])
-        reduction_data = []
+    def get_report_key(self):
+        """报告在发布状态中的键（报告输出路径）"""
+        return self.config.get('file_paths.html_output')
+    
+    def get_published_state(self):
+        """获取当前报告最近一次成功发布的记录"""
+        return ReportState().get(self.get_report_key())
+    
+    def is_up_to_date(self, data=None):
+        """数据、模板和配置都与最近一次成功发布时相同，且报告文件仍然存在"""
+        if data is None:
+            data = self.load_daily_records()
+        if not data:
+            return False
         
-        # 计算每天的开始青辉石减去前一天的结束青辉石
-        for i in range(1, len(data_sorted)):
-            current_day = data_sorted[i]
-            previous_day = data_sorted[i-1]
-            
-            # 计算减少量
-            reduction = previous_day['end_diamond'] - current_day['start_diamond']
-            
-            # 只有当减少量为正时才计入
-            if reduction > 0:
-                draws = reduction // 120  # 计算对应的抽卡次数
-                reduction_data.append({
-                    'date': current_day['date'],
-                    'start_diamond': current_day['start_diamond'],
-                    'previous_end_diamond': previous_day['end_diamond'],
-                    'reduction': reduction,
-                    'draws': draws,
-                    'datetime': current_day['datetime']
-                })
+        self.last_fingerprint = self.compute_fingerprint(data)
+        published = self.get_published_state()
+        if not published or published.get('fingerprint') != self.last_fingerprint:
+            return False
         
-        # 按日期降序排序（最近的在前）
-        reduction_data.sort(key=lambda x: x['datetime'], reverse=True)
-        return reduction_data
+        html_file = self.get_report_key()
+        return all(os.path.exists(file_path) for file_path, _ in self.get_report_artifacts(html_file))
     
-    def process_baah_data(self):
-        """处理BAAH资源数据并生成HTML报告"""
-        # 读取所有JSON文件
-        folder_path = self.config.get('file_paths.resources_folder')
-        json_files = glob.glob(os.path.join(folder_path, "*.json"))
-        
-        if not json_files:
-            print("未找到BAAH资源文件")
-            return None
+    def mark_published(self):
+        """记录报告已成功发布（上传成功或未启用上传时调用）"""
+        if self.last_fingerprint:
+            ReportState().mark_published(self.get_report_key(), self.last_fingerprint, self.last_summary)
+    
+    def process_baah_data(self, force=False):
+        """处理BAAH资源数据并生成HTML报告
         
-        # 解析数据
-        data = []
-        for file_path in json_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    file_data = json.load(f)
-                    
-                    # 提取日期作为文件名
-                    date_str = os.path.basename(file_path).replace('.json', '')
-                    
-                    # 解析开始和结束时间
-                    start_time = datetime.strptime(file_data['start_time'], '%Y-%m-%d %H:%M:%S')
-                    end_time = datetime.strptime(file_data['end_time'], '%Y-%m-%d %H:%M:%S')
-                    
-                    # 计算任务时长（分钟）
-                    duration_minutes = (end_time - start_time).total_seconds() / 60
-                    
-                    # 解析资源值
-                    start_diamond = self.parse_resource_value(file_data['start_resource'].get('diamond', 0))
-                    end_diamond = self.parse_resource_value(file_data['end_resource'].get('diamond', 0))
-                    
-                    start_credit = self.parse_resource_value(file_data['start_resource'].get('credit', 0))
-                    end_credit = self.parse_resource_value(file_data['end_resource'].get('credit', 0))
-                    
-                    data.append({
-                        'date': date_str,
-                        'datetime': start_time.date(),
-                        'start_time': file_data['start_time'],
-                        'end_time': file_data['end_time'],
-                        'duration_minutes': duration_minutes,
-                        'start_diamond': start_diamond,
-                        'end_diamond': end_diamond,
-                        'start_credit': start_credit,
-                        'end_credit': end_credit
-                    })
-            except Exception as e:
-                print(f"处理文件 {file_path} 时出错: {e}")
+        数据、模板和配置与最近一次成功发布时相同时跳过生成，返回None（force为True时总是生成）
+        """
+        # 读取所有资源文件（已解析的文件从索引中复用）
+        data = self.load_daily_records()
         
         if not data:
-            print("没有有效数据")
+            print("未找到BAAH资源文件")
             return None
         
-        # 按日期升序排序（用于计算净增益）
-        data.sort(key=lambda x: x['datetime'])
-        
-        # 计算两种增益
-        for i in range(len(data)):
-            # BAAH增益：今天的结束减去今天的开始
-            data[i]['baah_diamond_gain'] = data[i]['end_diamond'] - data[i]['start_diamond']
-            data[i]['baah_credit_gain'] = data[i]['end_credit'] - data[i]['start_credit']
-            
-            # 净增益：今天减去上一天结束（第一天没有前一天，净增益等于BAAH增益）
-            if i == 0:
-                data[i]['net_diamond_gain'] = data[i]['baah_diamond_gain']
-                data[i]['net_credit_gain'] = data[i]['baah_credit_gain']
-            else:
-                data[i]['net_diamond_gain'] = data[i]['end_diamond'] - data[i-1]['end_diamond']
-                data[i]['net_credit_gain'] = data[i]['end_credit'] - data[i-1]['end_credit']
-        
-        # 按日期降序排序（最近的在前）
-        data_sorted = sorted(data, key=lambda x: x['datetime'], reverse=True)
-        
-        # 计算周度和月度报告
-        weekly_report = self.calculate_weekly_report(data)
-        monthly_report = self.calculate_monthly_report(data)
+        if self.is_up_to_date(data) and not force:
+            print("资源数据和报告模板未变化，跳过生成和上传（使用 --force 强制重新生成）")
+            return None
         
-        # 计算青辉石减少量报告
-        reduction_report = self.calculate_diamond_reduction(data)
+        # 单次遍历计算每日增益、周度、月度、青辉石减少量和总体统计
+        backend = self.config.get('report.analytics_backend', 'auto')
+        report = create_report_analytics(data, backend).run()
+        self.last_summary = report['summary']
         
         # 生成HTML报告
-        html_file_path = self.generate_html_report(data_sorted, weekly_report, monthly_report, reduction_report)
+        html_file_path = self.generate_html_report(report['daily'], report['weekly'], report['monthly'],
+                                                   report['reduction'], report['summary'])
         
         return html_file_path
     
-    def generate_html_report(self, data, weekly_report, monthly_report, reduction_report):
-        """生成HTML报告"""
-        # 准备数据用于JavaScript - 使用json.dumps确保正确的JSON格式
-        data_json_str = json.dumps(data, default=str, ensure_ascii=False)
-        weekly_json_str = json.dumps(weekly_report, default=str, ensure_ascii=False)
-        monthly_json_str = json.dumps(monthly_report, default=str, ensure_ascii=False)
-        reduction_json_str = json.dumps(reduction_report, default=str, ensure_ascii=False)
-        
-        # 计算总体统计信息（全部数据）
-        total_days = len(data)
-        
-        # 计算当前总抽卡次数（基于最近一天的结束青辉石）
-        if data:
-            current_total_draws = int(data[0]['end_diamond'] // 120)  # 使用最近一天的结束青辉石
-        else:
-            current_total_draws = 0
-        
-        # 计算青辉石减少总量和抽卡次数
-        total_diamond_reduction = sum(item['reduction'] for item in reduction_report)
-        total_draws = sum(item['draws'] for item in reduction_report)
+    def iter_report_data_json(self, data, weekly_report, monthly_report, reduction_report, ranges):
+        """逐列生成报告数据的紧凑JSON（每个数据集按列存储，只编码一次）
         
-        # 计算总青辉石获得
-        total_baah_diamond_gain = sum(item['baah_diamond_gain'] for item in data)
-        total_net_diamond_gain = sum(item['net_diamond_gain'] for item in data)
-        total_baah_credit_gain = sum(item['baah_credit_gain'] for item in data)
-        total_net_credit_gain = sum(item['net_credit_gain'] for item in data)
-        
-        # 过滤掉负数数据计算平均值
-        positive_baah_days = [item for item in data if item['baah_diamond_gain'] > 0]
-        positive_net_days = [item for item in data if item['net_diamond_gain'] > 0]
-        positive_credit_days = [item for item in data if item['baah_credit_gain'] > 0]
-        positive_duration_days = [item for item in data if item['duration_minutes'] > 0]
-        
-        avg_baah_diamond_per_day = (sum(item['baah_diamond_gain'] for item in positive_baah_days) / 
-                                    len(positive_baah_days)) if positive_baah_days else 0
-        avg_net_diamond_per_day = (sum(item['net_diamond_gain'] for item in positive_net_days) / 
-                                  len(positive_net_days)) if positive_net_days else 0
-        avg_baah_credit_per_day = (sum(item['baah_credit_gain'] for item in positive_credit_days) / 
-                                  len(positive_credit_days)) if positive_credit_days else 0
-        avg_duration_per_day = (sum(item['duration_minutes'] for item in positive_duration_days) / 
-                               len(positive_duration_days)) if positive_duration_days else 0
+        格式: {"daily": {"date": [...], ...}, "weekly": {...}, "monthly": {...}, "reduction": {...}, "ranges": {...}}
+        ranges 为 build_range_summaries 预计算的时间范围统计和前缀和
+        """
+        datasets = (
+            ('daily', data),
+            ('weekly', weekly_report),
+            ('monthly', monthly_report),
+            ('reduction', reduction_report)
+        )
+        yield '{'
+        for i, (name, items) in enumerate(datasets):
+            yield (',' if i else '') + json.dumps(name) + ':{'
+            # 只在这里把记录对象转换为JSON，字段顺序由记录类型决定
+            fields = items[0].json_fields() if items else []
+            for j, (key, attr) in enumerate(fields):
+                column = list(map(attrgetter(attr), items))
+                yield (',' if j else '') + json.dumps(key) + ':'
+                yield json.dumps(column, default=str, ensure_ascii=False, separators=(',', ':'))
+            yield '}'
+        yield ',"ranges":' + json.dumps(ranges, ensure_ascii=False, separators=(',', ':'))
+        yield '}'
+    
+    def iter_inline_data_js(self, data, weekly_report, monthly_report, reduction_report, ranges):
+        """生成嵌入页面<script>中的报告数据（对象字面量）"""
+        for chunk in self.iter_report_data_json(data, weekly_report, monthly_report, reduction_report, ranges):
+            # 避免数据中的 "</" 提前结束<script>标签
+            yield chunk.replace('</', '<\\/')
+    
+    def get_sidecar_name(self, suffix=None):
+        """报告数据文件的文件名（report.sidecar_gzip 启用时为gzip压缩的 .data.json.gz）
         
-        # 计算总抽卡次数（基于净青辉石获得）
-        total_net_draws = total_net_diamond_gain // 120
+        本地文件、仓库中的文件和页面加载的相对路径都使用这个名字
+        """
+        if suffix is None:
+            suffix = SIDECAR_SUFFIXES[1] if self.config.get_bool('report.sidecar_gzip', False) else SIDECAR_SUFFIXES[0]
+        return REPORT_NAME + suffix
+    
+    def get_sidecar_path(self, output_path, suffix=None):
+        """获取本地报告数据文件路径（与报告放在同一目录）"""
+        return os.path.join(os.path.dirname(output_path), self.get_sidecar_name(suffix))
+    
+    def write_sidecar(self, sidecar_path, data, weekly_report, monthly_report, reduction_report, ranges):
+        """写入报告数据文件（可选gzip压缩），先写临时文件再替换"""
+        temp_path = sidecar_path + '.tmp'
+        chunks = self.iter_report_data_json(data, weekly_report, monthly_report, reduction_report, ranges)
+        try:
+            if sidecar_path.endswith('.gz'):
+                # mtime固定为0，数据不变时压缩结果也不变
+                with open(temp_path, 'wb') as raw, \
+                        gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as f:
+                    for chunk in chunks:
+                        f.write(chunk.encode('utf-8'))
+            else:
+                with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            os.replace(temp_path, sidecar_path)
+            return True
+        except Exception as e:
+            print(f"写入报告数据文件失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+    
+    def build_template_values(self, data, weekly_report, monthly_report, reduction_report, summary, ranges, now):
+        """生成单文件模式的模板变量（嵌入数据为生成器函数，渲染时才逐段生成）"""
+        # 总体统计信息（全部数据）
+        total_days = summary['total_days']
+        current_total_draws = summary['current_total_draws']
+        total_diamond_reduction = summary['total_diamond_reduction']
+        total_draws = summary['total_draws']
+        total_baah_diamond_gain = summary['total_baah_diamond_gain']
+        total_net_diamond_gain = summary['total_net_diamond_gain']
+        total_baah_credit_gain = summary['total_baah_credit_gain']
+        avg_baah_diamond_per_day = summary['avg_baah_diamond_per_day']
+        avg_net_diamond_per_day = summary['avg_net_diamond_per_day']
+        avg_baah_credit_per_day = summary['avg_baah_credit_per_day']
+        avg_duration_per_day = summary['avg_duration_per_day']
+        total_net_draws = summary['total_net_draws']
         
         # 将信用点数据转换为万为单位（只取整数部分）
         total_baah_credit_wan = int(total_baah_credit_gain / 10000)
-        total_net_credit_wan = int(total_net_credit_gain / 10000)
         avg_baah_credit_wan = int(avg_baah_credit_per_day / 10000) if avg_baah_credit_per_day > 0 else 0
         
-        # 生成每日数据表格行HTML
-        table_rows = []
-        for row in data:
-            baah_diamond_class = 'ba-positive' if row['baah_diamond_gain'] >= 0 else 'ba-negative'
-            net_diamond_class = 'ba-positive' if row['net_diamond_gain'] >= 0 else 'ba-negative'
-            baah_credit_class = 'ba-positive' if row['baah_credit_gain'] >= 0 else 'ba-negative'
-            net_credit_class = 'ba-positive' if row['net_credit_gain'] >= 0 else 'ba-negative'
-            
-            table_rows.append(f"""
-            <tr>
-                <td>{row['date']}</td>
-                <td>{row['start_diamond']}</td>
-                <td>{row['end_diamond']}</td>
-                <td class="{baah_diamond_class}">{row['baah_diamond_gain']}</td>
-                <td class="{net_diamond_class}">{row['net_diamond_gain']}</td>
-                <td>{row['start_credit']:,}</td>
-                <td>{row['end_credit']:,}</td>
-                <td class="{baah_credit_class}">{row['baah_credit_gain']:,}</td>
-                <td class="{net_credit_class}">{row['net_credit_gain']:,}</td>
-                <td>{row['duration_minutes']:.2f}</td>
-            </tr>
-            """)
-        
-        # 生成青辉石减少量表格行HTML
-        reduction_rows = []
-        for item in reduction_report:
-            reduction_rows.append(f"""
-            <tr>
-                <td>{item['date']}</td>
-                <td>{item['previous_end_diamond']:,}</td>
-                <td>{item['start_diamond']:,}</td>
-                <td class="ba-negative">{item['reduction']:,}</td>
-                <td class="ba-warning">{item['draws']:,} 抽</td>
-            </tr>
-            """)
+        return {
+            'CURRENT_TIME': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'TOTAL_DAYS': str(total_days),
+            'TOTAL_BAAH_DIAMOND': str(total_baah_diamond_gain),
+            'TOTAL_NET_DIAMOND': str(total_net_diamond_gain),
+            'TOTAL_DRAWS': f'{total_net_draws:,}',
+            'CURRENT_TOTAL_DRAWS': f'{current_total_draws:,}',
+            'TOTAL_BAAH_CREDIT': str(total_baah_credit_wan),
+            'AVG_BAAH_DIAMOND': f'{avg_baah_diamond_per_day:.2f}',
+            'AVG_NET_DIAMOND': f'{avg_net_diamond_per_day:.2f}',
+            'AVG_BAAH_CREDIT': str(avg_baah_credit_wan),
+            'AVG_DURATION': f'{avg_duration_per_day:.2f}',
+            'TOTAL_REDUCTION': f'{total_diamond_reduction:,}',
+            'REDUCTION_DRAWS': f'{total_draws:,} 抽',
+            'REDUCTION_DAYS': str(len(reduction_report)),
+            'REPORT_DATA_JS': lambda: self.iter_inline_data_js(data, weekly_report, monthly_report, reduction_report, ranges),
+            'REPORT_DATA_URL': 'null'
+        }
+    
+    def get_template_path(self):
+        """获取报告模板路径"""
+        return os.path.join(os.path.dirname(__file__), 'templates', 'report_template.html')
+    
+    def get_strip_sections(self):
+        """需要去除的报告区块（report.strip_sections，列表或逗号分隔的字符串）"""
+        value = self.config.get('report.strip_sections') or []
+        if isinstance(value, str):
+            value = value.replace('，', ',').split(',')
+        sections = []
+        for name in value:
+            name = str(name).strip()
+            if name in OPTIONAL_SECTIONS:
+                sections.append(name)
+            elif name:
+                print(f"未知的报告区块: {name}（可选: {', '.join(OPTIONAL_SECTIONS)}）")
+        return sections
+    
+    def get_template_cache_folder(self):
+        """压缩后模板的缓存目录：数据目录下的 template_cache，按模板版本保存压缩结果"""
+        return os.path.join(self.config.data_dir(), 'template_cache')
+    
+    def load_report_template(self, template_path=None):
+        """加载报告模板（report.minify 启用时使用去除区块并压缩后的模板，每个模板版本只压缩一次）"""
+        return load_template(template_path or self.get_template_path(),
+                             minify=self.config.get_bool('report.minify', True),
+                             sections=self.get_strip_sections(),
+                             cache_dir=self.get_template_cache_folder())
+    
+    def generate_html_report(self, data, weekly_report, monthly_report, reduction_report, summary):
+        """生成HTML报告（summary为ReportAnalytics计算的总体统计）
         
-        # 生成周度报告表格行
-        weekly_rows = []
-        for week in weekly_report:
-            baah_class = 'ba-positive' if week['total_baah_diamond'] >= 0 else 'ba-negative'
-            net_class = 'ba-positive' if week['total_net_diamond'] >= 0 else 'ba-negative'
-            
-            weekly_rows.append(f"""
-            <tr>
-                <td>{week['week_range']}</td>
-                <td>{week['days_count']}</td>
-                <td class="{baah_class}">{week['total_baah_diamond']}</td>
-                <td class="{net_class}">{week['total_net_diamond']}</td>
-                <td>{week['avg_baah_diamond']:.2f}</td>
-                <td>{week['avg_net_diamond']:.2f}</td>
-                <td>{week['total_duration']:.2f}</td>
-                <td>{week['avg_duration']:.2f}</td>
-            </tr>
-            """)
+        嵌入数据边生成边写入临时文件，写入完成后再替换到输出路径，
+        内存占用不随历史数据增长，也不会在输出路径留下写了一半的报告。
+        """
+        # 预计算各时间范围的统计和前缀和，页面切换范围时不再重新遍历数据
+        now = datetime.now()
+        ranges = build_range_summaries(data, reduction_report, now)
         
-        # 生成月度报告表格行
-        monthly_rows = []
-        for month in monthly_report:
-            baah_class = 'ba-positive' if month['total_baah_diamond'] >= 0 else 'ba-negative'
-            net_class = 'ba-positive' if month['total_net_diamond'] >= 0 else 'ba-negative'
-            
-            monthly_rows.append(f"""
-            <tr>
-                <td>{month['month']}</td>
-                <td>{month['days_count']}</td>
-                <td class="{baah_class}">{month['total_baah_diamond']}</td>
-                <td class="{net_class}">{month['total_net_diamond']}</td>
-                <td>{month['avg_baah_diamond']:.2f}</td>
-                <td>{month['avg_net_diamond']:.2f}</td>
-                <td>{month['total_duration']:.2f}</td>
-                <td>{month['avg_duration']:.2f}</td>
-            </tr>
-            """)
+        template_values = self.build_template_values(data, weekly_report, monthly_report, reduction_report,
+                                                     summary, ranges, now)
         
-        # 创建完整的HTML内容
-        # 注意：JSON数据需要被正确转义，使用json.dumps将JSON字符串再次转义为JavaScript字符串
-        data_json_js = json.dumps(data_json_str)
-        weekly_json_js = json.dumps(weekly_json_str)
-        monthly_json_js = json.dumps(monthly_json_str)
-        reduction_json_js = json.dumps(reduction_json_str)
+        output_path = self.config.get('file_paths.html_output')
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        sidecar_path = self.get_sidecar_path(output_path)
+        if self.config.get('report.data_mode', 'inline') == 'sidecar':
+            # 数据文件模式：数据只写入报告旁的数据文件，页面加载后再读取并渲染表格
+            if not self.write_sidecar(sidecar_path, data, weekly_report, monthly_report, reduction_report, ranges):
+                return None
+            template_values.update({
+                'REPORT_DATA_JS': 'null',
+                'REPORT_DATA_URL': json.dumps(self.get_sidecar_name())
+            })
+        else:
+            # 单文件模式：清理之前数据文件模式留下的数据文件
+            for suffix in SIDECAR_SUFFIXES:
+                old_path = self.get_sidecar_path(output_path, suffix)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
         
-        # 加载外部HTML模板
-        template_path = os.path.join(os.path.dirname(__file__), 'templates', 'report_template.html')
+        # 加载外部HTML模板（预编译并按修改时间缓存，默认使用压缩后的模板）
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                html_template = f.read()
-            
-            # 替换模板变量
-            html_content = html_template.replace('{{CURRENT_TIME}}', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            html_content = html_content.replace('{{TOTAL_DAYS}}', str(total_days))
-            html_content = html_content.replace('{{TOTAL_BAAH_DIAMOND}}', str(total_baah_diamond_gain))
-            html_content = html_content.replace('{{TOTAL_NET_DIAMOND}}', str(total_net_diamond_gain))
-            html_content = html_content.replace('{{TOTAL_DRAWS}}', f'{total_net_draws:,}')
-            html_content = html_content.replace('{{CURRENT_TOTAL_DRAWS}}', f'{current_total_draws:,}')
-            html_content = html_content.replace('{{TOTAL_BAAH_CREDIT}}', str(total_baah_credit_wan))
-            html_content = html_content.replace('{{AVG_BAAH_DIAMOND}}', f'{avg_baah_diamond_per_day:.2f}')
-            html_content = html_content.replace('{{AVG_NET_DIAMOND}}', f'{avg_net_diamond_per_day:.2f}')
-            html_content = html_content.replace('{{AVG_BAAH_CREDIT}}', str(avg_baah_credit_wan))
-            html_content = html_content.replace('{{AVG_DURATION}}', f'{avg_duration_per_day:.2f}')
-            html_content = html_content.replace('{{TOTAL_REDUCTION}}', f'{total_diamond_reduction:,}')
-            html_content = html_content.replace('{{REDUCTION_DRAWS}}', f'{total_draws:,} 抽')
-            html_content = html_content.replace('{{REDUCTION_DAYS}}', str(len(reduction_report)))
-            html_content = html_content.replace('{{TABLE_ROWS}}', ''.join(table_rows))
-            html_content = html_content.replace('{{WEEKLY_ROWS}}', ''.join(weekly_rows))
-            html_content = html_content.replace('{{MONTHLY_ROWS}}', ''.join(monthly_rows))
-            html_content = html_content.replace('{{REDUCTION_ROWS}}', ''.join(reduction_rows))
-            html_content = html_content.replace('{{DATA_JSON_JS}}', data_json_js)
-            html_content = html_content.replace('{{WEEKLY_JSON_JS}}', weekly_json_js)
-            html_content = html_content.replace('{{MONTHLY_JSON_JS}}', monthly_json_js)
-            html_content = html_content.replace('{{REDUCTION_JSON_JS}}', reduction_json_js)
+            template = self.load_report_template()
         except Exception as e:
             print(f"加载模板失败: {e}")
             return None
         
-        # 保存HTML文件
-        output_path = self.config.get('file_paths.html_output')
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # 流式写入临时文件，完成后原子替换到输出路径
+        temp_path = output_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                template.render_to(f, template_values)
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            print(f"写入报告失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
         
         print(f"报告已生成: {output_path}")
         return output_path
     
-    def upload_to_gitee(self, file_path):
+    def get_remote_prefix(self):
+        """仓库中的目录前缀（多账号时每个账号的报告放在以账号名命名的目录中）"""
+        return f"{self.account.name}/" if self.account else ""
+    
+    def get_report_artifacts(self, html_file):
+        """获取需要上传的报告文件列表 [(本地路径, 仓库中的文件名)]"""
+        prefix = self.get_remote_prefix()
+        artifacts = [(html_file, prefix + REPORT_NAME + ".html")]
+        if self.config.get('report.data_mode', 'inline') == 'sidecar':
+            sidecar_path = self.get_sidecar_path(html_file)
+            if os.path.exists(sidecar_path):
+                # 数据文件与报告放在仓库的同一目录，页面通过相对路径加载
+                artifacts.insert(0, (sidecar_path, prefix + self.get_sidecar_name()))
+        return artifacts
+    
+    def publish_report(self, html_file):
+        """发布报告：启用Gitee上传时将报告及其数据文件加入上传队列（先上传数据文件，避免页面引用不存在的数据），
+        由后台线程上传并在成功后记录发布状态；未启用上传时直接记录发布状态
+        
+        加入队列或记录成功时返回True
         """
-        通过Gitee API将文件上传到指定仓库
+        if not self.config.get_bool('gitee.enabled', True):
+            print("Gitee上传已禁用，跳过上传")
+            self.mark_published()
+            return True
+        
+        job_id = UploadQueue().enqueue(self.get_report_artifacts(html_file), self.account,
+                                       self.get_report_key(), self.last_fingerprint, self.last_summary)
+        return job_id is not None
+    
+    def upload_to_gitee(self, file_path, file_name="baah_task_report.html"):
+        """
+        通过Gitee API将文件上传到指定仓库，上传成功（或内容未变化）返回True
         """
         # 检查是否启用了Gitee上传
-        gitee_enabled = self.config.get('gitee.enabled', True)
-        if not gitee_enabled:
+        if not self.config.get_bool('gitee.enabled', True):
             print("Gitee上传已禁用，跳过上传")
-            return
-        
-        owner = self.config.get('gitee.owner')
-        repo = self.config.get('gitee.repo')
-        branch = self.config.get('gitee.branch')
-        access_token = self.config.get('gitee.access_token')
-        file_name = "baah_task_report.html"
-        
-        if not all([owner, repo, access_token]):
-            print("Gitee配置不完整，跳过上传")
-            return
-        
-        # 读取文件内容
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"读取文件失败: {e}")
-            return
-        
-        # Base64编码内容
-        content_base64 = base64.b64encode(content.encode('utf-8')).decode('utf-8')
-        
-        # Gitee API URL
-        api_url = f"https://gitee.com/api/v5/repos/{owner}/{repo}/contents/{file_name}"
+            return False
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Content-Type": "application/json;charset=UTF-8"
-        }
-        
-        params = {
-            "access_token": access_token,
-            "ref": branch
-        }
-        
-        try:
-            # 检查文件是否存在
-            response = requests.get(api_url, headers=headers, params=params)
-            
-            sha = None
-            if response.status_code == 200:
-                file_info = response.json()
-                if isinstance(file_info, dict):
-                    sha = file_info.get('sha')
-                    print("文件已存在，将更新")
-                elif isinstance(file_info, list):
-                    for item in file_info:
-                        if isinstance(item, dict) and item.get('name') == file_name:
-                            sha = item.get('sha')
-                            print("文件已存在，将更新")
-                            break
-            elif response.status_code == 404:
-                print("文件不存在，将创建新文件")
-            else:
-                print(f"检查文件失败: {response.status_code} - {response.text}")
-                return
-            
-            # 准备上传数据
-            data = {
-                "access_token": access_token,
-                "message": f"更新BAAH任务报告 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                "content": content_base64,
-                "branch": branch
-            }
-            
-            if sha:
-                data["sha"] = sha
-            
-            # 上传文件
-            upload_response = requests.put(api_url, headers=headers, json=data)
-            
-            if upload_response.status_code in [200, 201]:
-                result = upload_response.json()
-                if isinstance(result, dict):
-                    content_info = result.get('content', {})
-                    if isinstance(content_info, dict):
-                        html_url = content_info.get('html_url')
-                    else:
-                        html_url = result.get('html_url')
-                    
-                    if html_url:
-                        print(f"成功上传文件到Gitee: {html_url}")
-                    else:
-                        print("成功上传文件到Gitee，但无法获取URL")
-                else:
-                    print("上传成功")
-            else:
-                print(f"上传文件失败: {upload_response.status_code} - {upload_response.text}")
-                
-        except Exception as e:
-            print(f"上传到Gitee时出错: {e}")
+        return GiteeClient(self.config).upload_file(file_path, file_name)
@@ -0,0 +1,146 @@
+from operator import attrgetter
+
+# 按日期排序用的取值函数（DailyRecord 和 ReductionRecord 都有 datetime 属性）
+by_datetime = attrgetter('datetime')
+
+
+class DailyRecord:
+    """一天的资源数据
+
+    使用 __slots__ 存储，比每天一个字典占用的内存少得多，统计循环中按属性读取也更快。
+    只在写入JSON（资源索引、报告数据、内容指纹）时通过 to_dict() 转换为字典，字段顺序与原来的字典相同。
+    增益字段由 ReportAnalytics 计算后填入，计算前为None。
+    """
+
+    # 资源文件解析得到的字段
+    BASE_FIELDS = (
+        'date', 'datetime', 'start_time', 'end_time', 'duration_minutes',
+        'start_diamond', 'end_diamond', 'start_credit', 'end_credit'
+    )
+    # 统计时计算的增益字段
+    GAIN_FIELDS = ('baah_diamond_gain', 'baah_credit_gain', 'net_diamond_gain', 'net_credit_gain')
+
+    __slots__ = BASE_FIELDS + GAIN_FIELDS
+
+    def __init__(self, date, datetime, start_time, end_time, duration_minutes,
+                 start_diamond, end_diamond, start_credit, end_credit):
+        self.date = date
+        self.datetime = datetime
+        self.start_time = start_time
+        self.end_time = end_time
+        self.duration_minutes = duration_minutes
+        self.start_diamond = start_diamond
+        self.end_diamond = end_diamond
+        self.start_credit = start_credit
+        self.end_credit = end_credit
+        self.baah_diamond_gain = None
+        self.baah_credit_gain = None
+        self.net_diamond_gain = None
+        self.net_credit_gain = None
+
+    @classmethod
+    def from_dict(cls, values):
+        """从字典创建（只读取解析得到的字段）"""
+        return cls(*(values[field] for field in cls.BASE_FIELDS))
+
+    def fields(self):
+        """当前有值的字段（计算增益之前不包含增益字段）"""
+        if self.baah_diamond_gain is None:
+            return self.BASE_FIELDS
+        return self.__slots__
+
+    def json_fields(self):
+        """写入报告数据时的 (键, 属性名) 列表"""
+        return [(field, field) for field in self.fields()]
+
+    def to_dict(self):
+        """转换为字典"""
+        return {field: getattr(self, field) for field in self.fields()}
+
+    def copy(self):
+        """复制（不包含已计算的增益字段）"""
+        return DailyRecord(*(getattr(self, field) for field in self.BASE_FIELDS))
+
+    def __repr__(self):
+        return f"DailyRecord({self.date})"
+
+
+class ReductionRecord:
+    """一天的青辉石减少量（前一天结束青辉石减去当天开始青辉石）"""
+
+    __slots__ = ('date', 'start_diamond', 'previous_end_diamond', 'reduction', 'draws', 'datetime')
+
+    def __init__(self, date, start_diamond, previous_end_diamond, reduction, draws, datetime):
+        self.date = date
+        self.start_diamond = start_diamond
+        self.previous_end_diamond = previous_end_diamond
+        self.reduction = reduction
+        self.draws = draws
+        self.datetime = datetime
+
+    def json_fields(self):
+        """写入报告数据时的 (键, 属性名) 列表"""
+        return [(field, field) for field in self.__slots__]
+
+    def to_dict(self):
+        """转换为字典"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"ReductionRecord({self.date})"
+
+
+class PeriodSummary:
+    """周度或月度的统计结果
+
+    label 为显示的时间段（如 "2025-01-06 至 2025-01-12" 或 "2025年01月"），start 为时间段的开始日期。
+    子类的 LABEL_KEY / START_KEY 为写入报告数据时这两个字段使用的键。
+    """
+
+    LABEL_KEY = 'label'
+    START_KEY = 'start'
+    VALUE_FIELDS = (
+        'days_count', 'total_baah_diamond', 'total_net_diamond', 'avg_baah_diamond',
+        'avg_net_diamond', 'total_duration', 'avg_duration'
+    )
+
+    __slots__ = ('label', 'start') + VALUE_FIELDS
+
+    def __init__(self, label, start, days_count, total_baah_diamond, total_net_diamond,
+                 avg_baah_diamond, avg_net_diamond, total_duration, avg_duration):
+        self.label = label
+        self.start = start
+        self.days_count = days_count
+        self.total_baah_diamond = total_baah_diamond
+        self.total_net_diamond = total_net_diamond
+        self.avg_baah_diamond = avg_baah_diamond
+        self.avg_net_diamond = avg_net_diamond
+        self.total_duration = total_duration
+        self.avg_duration = avg_duration
+
+    def json_fields(self):
+        """写入报告数据时的 (键, 属性名) 列表"""
+        return [(self.LABEL_KEY, 'label'), (self.START_KEY, 'start')] + [(field, field) for field in self.VALUE_FIELDS]
+
+    def to_dict(self):
+        """转换为字典"""
+        return {key: getattr(self, field) for key, field in self.json_fields()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.label})"
+
+
+class WeeklySummary(PeriodSummary):
+    """周度统计（周一到周日）"""
+
+    LABEL_KEY = 'week_range'
+    START_KEY = 'week_start'
+    __slots__ = ()
+
+
+class MonthlySummary(PeriodSummary):
+    """月度统计"""
+
+    LABEL_KEY = 'month'
+    START_KEY = 'month_start'
+    __slots__ = ()
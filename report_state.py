@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import datetime
+from config_manager import ConfigManager
+
+class ReportState:
+    """报告发布状态
+
+    记录每个报告最近一次成功生成并上传时的内容指纹和总体统计，
+    以报告输出路径为键（多账号时每个账号的报告各有一条记录）。
+    """
+
+    STATE_FILE_NAME = "report_state.json"
+
+    def __init__(self, state_path=None):
+        self.config = ConfigManager()
+        self.state_path = state_path or self.get_state_path()
+
+    def get_state_path(self):
+        """报告发布状态文件路径：数据目录下的 report_state.json"""
+        return os.path.join(self.config.data_dir(), self.STATE_FILE_NAME)
+
+    def _load(self):
+        """读取状态文件，不存在或损坏时返回空状态"""
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except Exception as e:
+            print(f"读取报告状态失败: {e}")
+            return {}
+
+    def get(self, report_key):
+        """获取某个报告的发布记录"""
+        return self._load().get(report_key)
+
+    def mark_published(self, report_key, fingerprint, summary=None):
+        """记录报告已成功发布（先写临时文件再替换）"""
+        state = self._load()
+        state[report_key] = {
+            'fingerprint': fingerprint,
+            'summary': summary,
+            'published_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+        temp_path = self.state_path + ".tmp"
+        try:
+            folder = os.path.dirname(self.state_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.state_path)
+            return True
+        except Exception as e:
+            print(f"保存报告状态失败: {e}")
+            return False
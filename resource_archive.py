@@ -0,0 +1,165 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from resource_loader import loads, load_json_file
+
+# 资源文件名：YYYY-MM-DD.json
+DAY_FILE_PATTERN = re.compile(r'^(\d{4}-\d{2})-\d{2}\.json$')
+
+
+class ResourceArchive:
+    """资源文件夹中按月归档的资源数据
+
+    已经结束的月份，每天一个的 YYYY-MM-DD.json 文件可以合并为 archive/YYYY-MM.jsonl.gz，
+    每行为 {"date": 日期, "data": 资源文件内容}，按日期排列。
+    读取时归档和散落的资源文件一起读取，同一天两者都有时以资源文件为准（如重新获取了某天的数据）。
+    """
+
+    ARCHIVE_FOLDER_NAME = "archive"
+    ARCHIVE_SUFFIX = ".jsonl.gz"
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self.archive_folder = os.path.join(folder_path, self.ARCHIVE_FOLDER_NAME)
+
+    def get_archive_path(self, month):
+        """某个月（YYYY-MM）的归档文件路径"""
+        return os.path.join(self.archive_folder, month + self.ARCHIVE_SUFFIX)
+
+    def list_archives(self):
+        """所有归档文件的路径（按月份排列）"""
+        if not os.path.isdir(self.archive_folder):
+            return []
+        with os.scandir(self.archive_folder) as it:
+            names = sorted(entry.name for entry in it
+                           if entry.name.endswith(self.ARCHIVE_SUFFIX) and entry.is_file())
+        return [os.path.join(self.archive_folder, name) for name in names]
+
+    def read_archive(self, archive_path):
+        """读取归档文件，返回按日期排列的 [(日期, 资源数据)]"""
+        with gzip.open(archive_path, 'rb') as f:
+            content = f.read()
+        days = []
+        for line in content.splitlines():
+            if line.strip():
+                item = loads(line)
+                days.append((item['date'], item['data']))
+        return days
+
+    def _write_archive(self, archive_path, days):
+        """写入归档文件（先写临时文件再替换；gzip头不记录时间，相同内容生成相同文件）"""
+        os.makedirs(self.archive_folder, exist_ok=True)
+        temp_path = archive_path + ".tmp"
+        with open(temp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            for date_str, data in sorted(days.items()):
+                line = json.dumps({'date': date_str, 'data': data}, ensure_ascii=False, separators=(',', ':'))
+                f.write(line.encode('utf-8') + b'\n')
+        os.replace(temp_path, archive_path)
+
+    def list_day_files(self):
+        """资源文件夹中的每日资源文件：{日期: 文件路径}"""
+        day_files = {}
+        if not os.path.isdir(self.folder_path):
+            return day_files
+        with os.scandir(self.folder_path) as it:
+            for entry in it:
+                if DAY_FILE_PATTERN.match(entry.name) and entry.is_file():
+                    day_files[entry.name[:-len('.json')]] = entry.path
+        return day_files
+
+    def list_dates(self, start_date=None, end_date=None):
+        """有资源数据的日期（归档和资源文件），升序排列
+
+        指定日期范围（YYYY-MM-DD，包含两端）时只读取与范围重叠的月份的归档
+        """
+        dates = set(self.list_day_files())
+        for archive_path in self.list_archives():
+            month = os.path.basename(archive_path)[:-len(self.ARCHIVE_SUFFIX)]
+            if (start_date and month < start_date[:7]) or (end_date and month > end_date[:7]):
+                continue
+            try:
+                dates.update(date_str for date_str, _ in self.read_archive(archive_path))
+            except Exception as e:
+                print(f"读取归档 {archive_path} 时出错: {e}")
+        return sorted(date_str for date_str in dates
+                      if (not start_date or date_str >= start_date) and (not end_date or date_str <= end_date))
+
+    def has_date(self, date_str):
+        """归档中是否有某天的数据（只读取该月的归档）"""
+        archive_path = self.get_archive_path(date_str[:7])
+        if not os.path.exists(archive_path):
+            return False
+        try:
+            return any(day == date_str for day, _ in self.read_archive(archive_path))
+        except Exception as e:
+            print(f"读取归档 {archive_path} 时出错: {e}")
+            return False
+
+    def iter_days(self):
+        """逐天读取所有资源数据（归档和资源文件），生成 (日期, 资源数据)，同一天以资源文件为准"""
+        day_files = self.list_day_files()
+        for archive_path in self.list_archives():
+            try:
+                days = self.read_archive(archive_path)
+            except Exception as e:
+                print(f"读取归档 {archive_path} 时出错: {e}")
+                continue
+            for date_str, data in days:
+                if date_str not in day_files:
+                    yield date_str, data
+
+        for date_str, file_path in sorted(day_files.items()):
+            try:
+                yield date_str, load_json_file(file_path)
+            except Exception as e:
+                print(f"读取文件 {file_path} 时出错: {e}")
+
+    def compact(self, current_month=None):
+        """将已经结束的月份（早于 current_month，默认为本月）的资源文件合并到归档，返回合并的文件数
+
+        已有归档时与归档中的数据合并（同一天以资源文件为准）；写入归档并读回校验后才删除资源文件，
+        无法解析的资源文件保留不动。
+        """
+        current_month = current_month or datetime.now().strftime('%Y-%m')
+        months = {}
+        for date_str, file_path in self.list_day_files().items():
+            month = date_str[:7]
+            if month < current_month:
+                months.setdefault(month, {})[date_str] = file_path
+
+        compacted = 0
+        for month, day_files in sorted(months.items()):
+            archive_path = self.get_archive_path(month)
+            try:
+                days = dict(self.read_archive(archive_path)) if os.path.exists(archive_path) else {}
+            except Exception as e:
+                print(f"读取归档 {archive_path} 失败，跳过 {month}: {e}")
+                continue
+
+            merged = []
+            for date_str, file_path in sorted(day_files.items()):
+                try:
+                    days[date_str] = load_json_file(file_path)
+                    merged.append(file_path)
+                except Exception as e:
+                    print(f"读取文件 {file_path} 时出错，保留该文件: {e}")
+            if not merged:
+                continue
+
+            try:
+                self._write_archive(archive_path, days)
+                # 读回校验，确认所有数据都已写入后再删除资源文件
+                if dict(self.read_archive(archive_path)) != days:
+                    raise ValueError("归档内容与资源文件不一致")
+            except Exception as e:
+                print(f"写入归档 {archive_path} 失败，保留 {month} 的资源文件: {e}")
+                continue
+
+            for file_path in merged:
+                os.remove(file_path)
+            compacted += len(merged)
+            print(f"已归档 {month}: {len(merged)} 个文件 -> {archive_path}（共 {len(days)} 天）")
+
+        return compacted
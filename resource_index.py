@@ -0,0 +1,158 @@
+import json
+import os
+from datetime import date
+from resource_loader import load_json_file, parse_files
+from report_models import DailyRecord
+from resource_archive import ResourceArchive
+
+class ResourceIndex:
+    """资源文件解析结果的持久化索引
+
+    以文件名为键，记录文件的修改时间和大小以及解析后的每日数据。
+    再次加载时只重新解析新增或发生变化的文件，其余直接复用索引中的结果。
+    同一个实例多次加载时（如常驻的报告进程），索引和每日数据保留在内存中，不再重新读取索引文件。
+    """
+
+    INDEX_FILE_NAME = ".resource_index.json"
+    INDEX_VERSION = 1
+
+    def __init__(self, folder_path, index_path=None):
+        self.folder_path = folder_path
+        self.index_path = index_path or os.path.join(folder_path, self.INDEX_FILE_NAME)
+        # 上次加载的索引条目和对应的每日数据（以文件名为键）
+        self.entries = None
+        self.records = {}
+
+    def _load_entries(self):
+        """读取索引文件，版本不符或文件损坏时返回空索引"""
+        if not os.path.exists(self.index_path):
+            return {}
+
+        try:
+            index_data = load_json_file(self.index_path)
+            if index_data.get('version') != self.INDEX_VERSION:
+                return {}
+            entries = index_data.get('entries', {})
+            return entries if isinstance(entries, dict) else {}
+        except Exception as e:
+            print(f"读取资源索引失败，将重新建立索引: {e}")
+            return {}
+
+    def _save_entries(self, entries):
+        """保存索引文件（先写临时文件再替换，避免留下损坏的索引）"""
+        temp_path = self.index_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.INDEX_VERSION, 'entries': entries}, f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            print(f"保存资源索引失败: {e}")
+
+    def _encode_record(self, record):
+        """将每日数据转换为可写入JSON的格式"""
+        encoded = record.to_dict()
+        encoded['datetime'] = record.datetime.isoformat()
+        return encoded
+
+    def _decode_record(self, encoded):
+        """将索引中的数据还原为每日数据"""
+        record = DailyRecord.from_dict(encoded)
+        record.datetime = date.fromisoformat(encoded['datetime'])
+        return record
+
+    def load_records(self, parse_file, max_workers=None, parse_archive=None):
+        """加载文件夹中所有资源文件的每日数据
+
+        parse_file(file_path) 用于解析新增或变化的文件，返回 DailyRecord，
+        parse_archive(archive_path) 用于解析新增或变化的月度归档，返回 DailyRecord 列表（为None时不读取归档），
+        需要解析的文件在线程池中并行读取（max_workers为线程数，None为默认值）。
+        同一天归档和资源文件中都有数据时以资源文件为准。
+        返回列表的顺序与 glob 遍历文件夹的顺序一致，归档中的数据排在最后。
+        返回的是内存中缓存记录的副本（统计时会在记录上填入增益字段）。
+        """
+        entries = self.entries if self.entries is not None else self._load_entries()
+        new_entries = {}
+        new_records = {}
+        # 按遍历顺序排列：(索引中的名称, 缓存的每日数据列表, stat, 路径)，每日数据为None表示需要解析
+        slots = []
+        to_parse = []
+        archive_paths = set()
+
+        def add_slot(name, path, stat, is_archive):
+            cached = entries.get(name)
+            if (cached and cached.get('mtime') == stat.st_mtime_ns
+                    and cached.get('size') == stat.st_size
+                    and ('records' if is_archive else 'record') in cached):
+                records = self.records.get(name)
+                if records is None:
+                    encoded = cached['records'] if is_archive else [cached['record']]
+                    records = [self._decode_record(item) for item in encoded]
+                new_entries[name] = cached
+                new_records[name] = records
+                slots.append((name, records, None, path))
+                return
+
+            slots.append((name, None, stat, path))
+            to_parse.append(path)
+            if is_archive:
+                archive_paths.add(path)
+
+        with os.scandir(self.folder_path) as it:
+            for entry in it:
+                # 与 glob("*.json") 保持一致：跳过隐藏文件（包括索引文件本身）
+                if entry.name.startswith('.') or not entry.name.endswith('.json'):
+                    continue
+                if not entry.is_file():
+                    continue
+                add_slot(entry.name, entry.path, entry.stat(), False)
+
+        if parse_archive is not None:
+            for archive_path in ResourceArchive(self.folder_path).list_archives():
+                name = f"{ResourceArchive.ARCHIVE_FOLDER_NAME}/{os.path.basename(archive_path)}"
+                add_slot(name, archive_path, os.stat(archive_path), True)
+
+        def parse(path):
+            return parse_archive(path) if path in archive_paths else parse_file(path)
+
+        parsed = dict(parse_files(to_parse, parse, max_workers))
+
+        for name, records, stat, path in slots:
+            if records is not None:
+                continue
+
+            result = parsed.get(path)
+            if result is None:
+                continue
+            if path in archive_paths:
+                new_entries[name] = {
+                    'mtime': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'records': [self._encode_record(record) for record in result]
+                }
+                new_records[name] = result
+            else:
+                new_entries[name] = {
+                    'mtime': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'record': self._encode_record(result)
+                }
+                new_records[name] = [result]
+
+        # 资源文件中已有的日期不再使用归档中的数据
+        loose_dates = {name[:-len('.json')] for name in new_records if name.endswith('.json')}
+        records = []
+        for name, _, _, _ in slots:
+            if name not in new_records:
+                continue
+            is_archive = not name.endswith('.json')
+            for record in new_records[name]:
+                if not is_archive or record.date not in loose_dates:
+                    records.append(record.copy())
+
+        # 有文件新增、变化或被删除时才重写索引
+        if to_parse or len(new_entries) != len(entries):
+            self._save_entries(new_entries)
+
+        self.entries = new_entries
+        self.records = new_records
+        return records
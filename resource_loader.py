@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# 优先使用更快的JSON解析库（可选依赖），未安装时使用标准库
+try:
+    import orjson
+    JSON_BACKEND = 'orjson'
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        JSON_BACKEND = 'ujson'
+        _loads = ujson.loads
+    except ImportError:
+        JSON_BACKEND = 'json'
+        _loads = json.loads
+
+# 资源文件中时间的格式
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 需要解析的文件少于该数量时不使用线程池
+PARALLEL_MIN_FILES = 8
+
+
+def loads(data):
+    """解析JSON（data可以是bytes或str）"""
+    return _loads(data)
+
+
+def load_json_file(file_path):
+    """读取并解析JSON文件（按字节读取，由解析库处理UTF-8解码）"""
+    with open(file_path, 'rb') as f:
+        return _loads(f.read())
+
+
+def parse_timestamp(text):
+    """解析 "YYYY-MM-DD HH:MM:SS" 格式的时间
+
+    按固定位置截取各字段，比 datetime.strptime 快得多；格式不是固定宽度时（如未补零）仍使用 strptime。
+    """
+    if (len(text) == 19 and text[4] == '-' and text[7] == '-' and text[10] == ' '
+            and text[13] == ':' and text[16] == ':'
+            and (text[0:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:19]).isdigit()):
+        return datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                        int(text[11:13]), int(text[14:16]), int(text[17:19]))
+    return datetime.strptime(text, TIMESTAMP_FORMAT)
+
+
+def get_max_workers(config):
+    """读取文件的线程数（storage.load_workers 为0时使用线程池的默认值）"""
+    try:
+        max_workers = int(config.get('storage.load_workers', 0) or 0)
+    except (TypeError, ValueError):
+        max_workers = 0
+    return max_workers if max_workers > 0 else None
+
+
+def parse_files(file_paths, parse_file, max_workers=None):
+    """解析多个文件，返回与 file_paths 顺序一致的 [(文件路径, 结果或None)]
+
+    文件较多时在线程池中读取和解析（重启后磁盘缓存为空时，读取文件的等待可以重叠）。
+    解析失败的文件打印错误信息，结果为None。
+    """
+    def parse(file_path):
+        try:
+            return parse_file(file_path)
+        except Exception as e:
+            print(f"处理文件 {file_path} 时出错: {e}")
+            return None
+
+    if len(file_paths) < PARALLEL_MIN_FILES or max_workers == 1:
+        return [(file_path, parse(file_path)) for file_path in file_paths]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(zip(file_paths, executor.map(parse, file_paths)))
@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from config_manager import ConfigManager
+from resource_archive import ResourceArchive
+
+class ResourceStore:
+    """基于SQLite的每日资源数据存储
+
+    替代每天一个JSON文件的存储方式，所有数据保存在一个按日期索引的数据库文件中。
+    写入（邮件处理）和读取（报告生成）都通过按日期范围的查询完成。
+    """
+
+    REQUIRED_KEYS = ("start_time", "start_resource", "end_time", "end_resource")
+
+    def __init__(self, db_path=None, config=None):
+        # config可以是按账号分区的配置（AccountConfig），默认使用全局配置
+        self.config = config or ConfigManager()
+        self.db_path = db_path or self.get_db_path()
+        self._ensure_schema()
+
+    @staticmethod
+    def is_enabled(config=None):
+        """是否启用了SQLite存储（config为AccountConfig时，账号设置中的 storage.backend 优先）"""
+        return (config or ConfigManager()).get('storage.backend', 'json') == 'sqlite'
+
+    def get_db_path(self):
+        """获取数据库文件路径（相对路径基于程序根目录）"""
+        db_path = self.config.get('storage.sqlite_file')
+        if not db_path:
+            resources_folder = self.config.get('file_paths.resources_folder')
+            return os.path.join(os.path.dirname(os.path.normpath(resources_folder)), 'resources.db')
+
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(self.config.get('root_dir', ''), db_path)
+        return db_path
+
+    @contextmanager
+    def _connect(self):
+        """打开数据库连接，退出时提交事务并关闭连接"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        """创建数据表"""
+        folder = os.path.dirname(self.db_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS daily_resources (
+                    date TEXT PRIMARY KEY,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    start_resource TEXT NOT NULL,
+                    end_resource TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+
+    def save_day(self, date_str, resource_data):
+        """保存某一天的资源数据（已存在则覆盖）"""
+        self.save_days([(date_str, resource_data)])
+
+    def save_days(self, items):
+        """批量保存资源数据，items为(日期, 资源数据)的列表"""
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [
+            (
+                date_str,
+                resource_data['start_time'],
+                resource_data['end_time'],
+                json.dumps(resource_data['start_resource'], ensure_ascii=False),
+                json.dumps(resource_data['end_resource'], ensure_ascii=False),
+                updated_at
+            )
+            for date_str, resource_data in items
+        ]
+
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO daily_resources
+                    (date, start_time, end_time, start_resource, end_resource, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def _range_sql(self, columns, start_date, end_date):
+        """生成按日期范围查询的SQL和参数"""
+        sql = f"SELECT {columns} FROM daily_resources"
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql + " ORDER BY date", params
+
+    def query_range(self, start_date=None, end_date=None):
+        """按日期范围查询资源数据（包含首尾，日期格式YYYY-MM-DD，None表示不限）
+
+        返回按日期升序排列的(日期, 资源数据)列表，资源数据与JSON文件内容格式一致。
+        """
+        sql, params = self._range_sql(
+            "date, start_time, end_time, start_resource, end_resource", start_date, end_date)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            (date_str, {
+                "start_time": start_time,
+                "start_resource": json.loads(start_resource),
+                "end_time": end_time,
+                "end_resource": json.loads(end_resource)
+            })
+            for date_str, start_time, end_time, start_resource, end_resource in rows
+        ]
+
+    def list_dates(self, start_date=None, end_date=None):
+        """按日期范围查询已有数据的日期"""
+        sql, params = self._range_sql("date", start_date, end_date)
+
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(sql, params)]
+
+    def migrate_from_json(self, folder_path):
+        """将资源文件夹中的JSON文件（包括月度归档）一次性导入数据库，返回导入的天数"""
+        items = []
+        for date_str, resource_data in ResourceArchive(folder_path).iter_days():
+            missing = [key for key in self.REQUIRED_KEYS if key not in resource_data]
+            if missing:
+                print(f"{date_str} 的资源数据缺少字段 {missing}，跳过")
+                continue
+            items.append((date_str, resource_data))
+
+        if items:
+            self.save_days(items)
+        return len(items)
@@ -0,0 +1,340 @@
+import os
+import re
+import hashlib
+
+# 模板占位符格式：{{NAME}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Z0-9_]+)\}\}')
+
+# 已编译模板缓存：(路径, 是否压缩, 去除的区块) -> (修改时间, 文件大小, 编译结果)
+_template_cache = {}
+
+# 压缩规则的版本，修改压缩规则后递增，使磁盘上缓存的压缩结果失效
+MINIFY_VERSION = 1
+
+# 可选区块标记：<!-- section:名称 --> ... <!-- /section:名称 -->
+SECTION_PATTERN = re.compile(r'<!--\s*section:([\w-]+)\s*-->.*?<!--\s*/section:\1\s*-->', re.S)
+
+# 压缩时临时替换占位符的标记（对CSS/JS/HTML都是普通标识符）
+PLACEHOLDER_TOKEN = '__BAAH_PLACEHOLDER_{}__'
+PLACEHOLDER_TOKEN_PATTERN = re.compile(r'__BAAH_PLACEHOLDER_(\d+)__')
+
+# 前后的空白可以去掉的块级标签
+BLOCK_TAGS = frozenset((
+    'html', 'head', 'body', 'title', 'meta', 'link', 'style', 'script', 'div', 'section', 'nav', 'main',
+    'header', 'footer', 'ul', 'ol', 'li', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', '!doctype'
+))
+HTML_TOKEN_PATTERN = re.compile(r'(<!--.*?-->|<(script|style|pre|textarea)\b.*?</\2\s*>|<[^>]*>)', re.S | re.I)
+TAG_NAME_PATTERN = re.compile(r'</?\s*(!?[a-zA-Z][a-zA-Z0-9]*)')
+
+# JS中这些字符之后的换行可以去掉（不会改变自动插入分号的结果）
+JS_NEWLINE_AFTER = frozenset('{([,;:=&|?!<>*%')
+# JS中这些字符之前的换行可以去掉
+JS_NEWLINE_BEFORE = frozenset('})],;.:?')
+# JS中正则表达式字面量可以出现在这些字符之后
+JS_REGEX_AFTER = frozenset('(,=:[!&|?{};+-*%<>~^')
+
+
+class CompiledTemplate:
+    """预编译的HTML模板
+
+    模板只解析一次，拆分为文本片段和占位符交替排列的列表。
+    渲染时按顺序拼接（或直接写入文件），不再对整个文档做多次 str.replace。
+    """
+
+    def __init__(self, text, source_hash=None):
+        # 模板内容的哈希，用于判断报告是否需要重新生成（压缩后的模板使用原模板的哈希）
+        self.source_hash = source_hash or hashlib.sha256(text.encode('utf-8')).hexdigest()
+        # split 的结果为 [文本, 占位符, 文本, 占位符, ..., 文本]
+        parts = PLACEHOLDER_PATTERN.split(text)
+        self.literals = parts[0::2]
+        self.placeholders = parts[1::2]
+
+    def _iter_parts(self, values):
+        """依次产生渲染结果的各个片段
+
+        占位符的值可以是字符串，也可以是返回字符串片段迭代器的函数（用于流式生成大段内容）。
+        未提供的占位符保持原样。
+        """
+        literals = self.literals
+        yield literals[0]
+        for i, name in enumerate(self.placeholders):
+            value = values.get(name)
+            if value is None:
+                yield '{{' + name + '}}'
+            elif callable(value):
+                yield from value()
+            else:
+                yield value
+            yield literals[i + 1]
+
+    def render(self, values):
+        """渲染为字符串"""
+        return ''.join(self._iter_parts(values))
+
+    def render_to(self, f, values):
+        """渲染并直接写入文件对象"""
+        for part in self._iter_parts(values):
+            f.write(part)
+
+
+def _is_identifier_char(ch):
+    return ch.isalnum() or ch in '_$' or ord(ch) > 127
+
+
+def _copy_quoted(text, i, quote):
+    """返回从引号i开始的字符串字面量的结束位置（不含）"""
+    n = len(text)
+    j = i + 1
+    while j < n and text[j] != quote:
+        if text[j] == '\\':
+            j += 1
+        elif text[j] == '\n' and quote != '`':
+            break
+        j += 1
+    return min(j + 1, n)
+
+
+def minify_css(css):
+    """压缩CSS：去除注释、多余空白和最后一个声明后的分号（字符串保持不变）"""
+    out = []
+    i = 0
+    n = len(css)
+    while i < n:
+        ch = css[i]
+        if ch in '"\'':
+            end = _copy_quoted(css, i, ch)
+            out.append(css[i:end])
+            i = end
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        elif ch.isspace():
+            while i < n and css[i].isspace():
+                i += 1
+            # 冒号前的空格在选择器中有意义（如 "a :hover"），只去掉这些符号前后的空白
+            prev = out[-1][-1] if out and out[-1] else ''
+            if prev and prev not in '{};,>:' and i < n and css[i] not in '{};,>!':
+                out.append(' ')
+        else:
+            if ch == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(ch)
+            i += 1
+    return ''.join(out).strip()
+
+
+def _collapse_template_literal(literal):
+    """模板字符串中的换行和缩进合并为一个空格（报告中的模板字符串都是HTML片段）"""
+    return re.sub(r'\s*\n\s*', ' ', literal)
+
+
+def minify_js(js):
+    """压缩JavaScript：去除注释和多余空白，保留可能影响自动插入分号的换行
+
+    字符串、模板字符串和正则表达式字面量保持不变（模板字符串只合并换行缩进），不重命名变量。
+    """
+    out = []
+    i = 0
+    n = len(js)
+    last = ''  # 上一个输出的非空白字符
+
+    while i < n:
+        ch = js[i]
+        if ch in '"\'':
+            end = _copy_quoted(js, i, ch)
+            out.append(js[i:end])
+            last = ch
+            i = end
+        elif ch == '`':
+            # 模板字符串，${...} 中可以嵌套表达式
+            j = i + 1
+            depth = 0
+            while j < n:
+                c = js[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if depth == 0 and c == '`':
+                    break
+                if js.startswith('${', j):
+                    depth += 1
+                    j += 2
+                    continue
+                if depth > 0 and c == '}':
+                    depth -= 1
+                elif depth > 0 and c in '"\'':
+                    j = _copy_quoted(js, j, c)
+                    continue
+                j += 1
+            out.append(_collapse_template_literal(js[i:j + 1]))
+            last = '`'
+            i = j + 1
+        elif js.startswith('//', i):
+            end = js.find('\n', i)
+            i = n if end < 0 else end
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        elif ch == '/' and (not last or last in JS_REGEX_AFTER or re.search(r'\b(return|typeof|case)\s*$', ''.join(out[-3:]))):
+            # 正则表达式字面量
+            j = i + 1
+            in_class = False
+            while j < n and js[j] != '\n':
+                c = js[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and _is_identifier_char(js[j]):
+                j += 1
+            out.append(js[i:j])
+            last = '/'
+            i = j
+        elif ch.isspace():
+            start = i
+            while i < n and js[i].isspace():
+                i += 1
+            if not last or i >= n:
+                continue
+            nxt = js[i]
+            if '\n' in js[start:i] and last not in JS_NEWLINE_AFTER and nxt not in JS_NEWLINE_BEFORE:
+                out.append('\n')
+            elif _is_identifier_char(last) and _is_identifier_char(nxt):
+                out.append(' ')
+            elif (last + nxt) in ('++', '--', '+-', '-+', '//', '/*') or (last == '/' and nxt == '/'):
+                out.append(' ')
+        else:
+            out.append(ch)
+            last = ch
+            i += 1
+    return ''.join(out).strip()
+
+
+def minify_html(text):
+    """压缩HTML模板：去除注释，合并空白，去掉块级标签前后的空白，并压缩 <style> 和 <script> 中的CSS/JS
+
+    文本中的连续空白合并为一个空格（与浏览器显示效果相同），<pre>/<textarea> 中的内容保持不变。
+    """
+    parts = []
+    pos = 0
+    for match in HTML_TOKEN_PATTERN.finditer(text):
+        parts.append(('text', text[pos:match.start()]))
+        token = match.group(0)
+        if token.startswith('<!--'):
+            pass
+        elif match.group(2):
+            tag = match.group(2).lower()
+            open_end = token.index('>') + 1
+            close_start = token.lower().rindex('</')
+            open_tag = re.sub(r'\s+', ' ', token[:open_end])
+            body = token[open_end:close_start]
+            if tag == 'style':
+                body = minify_css(body)
+            elif tag == 'script':
+                body = minify_js(body)
+            parts.append(('tag', open_tag + body + token[close_start:]))
+        else:
+            parts.append(('tag', re.sub(r'\s+', ' ', token)))
+        pos = match.end()
+    parts.append(('text', text[pos:]))
+
+    def is_block(index):
+        if 0 <= index < len(parts) and parts[index][0] == 'tag':
+            name = TAG_NAME_PATTERN.match(parts[index][1])
+            return bool(name) and name.group(1).lower() in BLOCK_TAGS
+        return False
+
+    out = []
+    for index, (kind, value) in enumerate(parts):
+        if kind == 'text':
+            value = re.sub(r'\s+', ' ', value)
+            if value == ' ' and (index == 0 or is_block(index - 1) or is_block(index + 1) or index == len(parts) - 1):
+                value = ''
+            elif value.startswith(' ') and is_block(index - 1):
+                value = value[1:]
+            if value.endswith(' ') and is_block(index + 1):
+                value = value[:-1]
+        out.append(value)
+    return ''.join(out).strip() + '\n'
+
+
+def strip_sections(text, names):
+    """去除模板中指定名称的可选区块（<!-- section:名称 --> ... <!-- /section:名称 -->）"""
+    names = set(names)
+    if not names:
+        return text
+    return SECTION_PATTERN.sub(lambda m: '' if m.group(1) in names else m.group(0), text)
+
+
+def minify_template(text, sections=()):
+    """去除指定区块并压缩模板，占位符 {{NAME}} 保持不变"""
+    text = strip_sections(text, sections)
+    names = []
+
+    def protect(match):
+        names.append(match.group(1))
+        return PLACEHOLDER_TOKEN.format(len(names) - 1)
+
+    minified = minify_html(PLACEHOLDER_PATTERN.sub(protect, text))
+    return PLACEHOLDER_TOKEN_PATTERN.sub(lambda m: '{{' + names[int(m.group(1))] + '}}', minified)
+
+
+def _load_minified(text, source_hash, sections, cache_dir):
+    """获取压缩后的模板内容，按模板哈希、压缩规则版本和去除的区块缓存在磁盘上"""
+    cache_path = None
+    if cache_dir:
+        key = hashlib.sha256(f"{source_hash}|{MINIFY_VERSION}|{','.join(sections)}".encode('utf-8')).hexdigest()
+        cache_path = os.path.join(cache_dir, key[:32] + '.html')
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+            except Exception as e:
+                print(f"读取模板缓存失败: {e}")
+
+    minified = minify_template(text, sections)
+
+    if cache_path:
+        temp_path = cache_path + '.tmp'
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(minified)
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            print(f"保存模板缓存失败: {e}")
+    return minified
+
+
+def load_template(template_path, minify=False, sections=(), cache_dir=None):
+    """加载并编译模板，模板文件未变化时直接使用缓存
+
+    minify为True时先去除sections中列出的可选区块并压缩CSS/JS/HTML，
+    压缩结果按模板内容保存在cache_dir中（每个模板版本只压缩一次）。
+    """
+    sections = tuple(sorted(sections)) if minify else ()
+    cache_key = (template_path, bool(minify), sections)
+    stat = os.stat(template_path)
+    cached = _template_cache.get(cache_key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(template_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if minify:
+        source_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        template = CompiledTemplate(_load_minified(text, source_hash, sections, cache_dir), source_hash)
+    else:
+        template = CompiledTemplate(text)
+
+    _template_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
@@ -0,0 +1,159 @@
+"""测试用的本地Gitee接口替身（标准库 http.server），只实现上传用到的接口"""
+import base64
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# 测试直接导入仓库根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_manager import ConfigReader
+from gitee_client import git_blob_sha
+
+OWNER = "owner"
+REPO = "repo"
+BRANCH = "master"
+TREE_SHA = "tree0000"
+
+
+class DictConfig(ConfigReader):
+    """测试用配置，按 'a.b' 从字典读取，不读取 config.json"""
+
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, default=None):
+        value = self.values
+        for k in key.split('.'):
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return default
+        return value
+
+
+class GiteeStubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 保持连接，用于检查会话是否复用连接
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _send(self, status, body=None):
+        data = json.dumps(body if body is not None else {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        prefix = f"/api/v5/repos/{OWNER}/{REPO}/"
+        path = unquote(url.path)
+        with self.server.lock:
+            self.server.requests.append((method, path[len(prefix):], parse_qs(url.query), body))
+
+        if self.server.stall.is_set():
+            # 不返回任何数据，直到测试结束
+            self.server.release.wait(10)
+            return
+        if not path.startswith(prefix):
+            return self._send(404, {"message": "Not Found"})
+        route = path[len(prefix):]
+        files = self.server.files
+
+        if route.startswith("contents/"):
+            file_name = route[len("contents/"):]
+            if method == "GET":
+                if file_name not in files:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"name": file_name.rsplit('/', 1)[-1], "sha": git_blob_sha(files[file_name])})
+            if method == "PUT":
+                if file_name in files and body.get("sha") != git_blob_sha(files[file_name]):
+                    return self._send(409, {"message": "sha mismatch"})
+                files[file_name] = base64.b64decode(body["content"])
+                return self._send(201, {"content": {"html_url": f"http://stub/{file_name}"}})
+
+        if method == "GET" and route == f"branches/{BRANCH}":
+            if self.server.branch_status != 200:
+                return self._send(self.server.branch_status, {"message": "Branch Not Found"})
+            return self._send(200, {"name": BRANCH, "commit": {"sha": "commit0000",
+                                                               "commit": {"tree": {"sha": TREE_SHA}}}})
+
+        if method == "GET" and route == f"git/trees/{TREE_SHA}":
+            tree = [{"path": name, "type": "blob", "sha": git_blob_sha(content)} for name, content in files.items()]
+            return self._send(200, {"sha": TREE_SHA, "tree": tree, "truncated": False})
+
+        if method == "POST" and route == "commits":
+            if self.server.commits_status not in (200, 201):
+                return self._send(self.server.commits_status, {"message": "commit failed"})
+            for action in body["actions"]:
+                files[action["path"]] = base64.b64decode(action["content"])
+            return self._send(201, {"html_url": "http://stub/commit/1"})
+
+        return self._send(404, {"message": "Not Found"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class GiteeStub(ThreadingHTTPServer):
+    """在后台线程运行的Gitee接口替身
+
+    files: 仓库中的文件 {路径: 内容}；requests: 收到的请求 [(方法, 路由, 查询参数, JSON请求体)]
+    branch_status / commits_status: 分支查询和提交接口返回的状态码；stall 设置后请求不再响应
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), GiteeStubHandler)
+        self.lock = threading.Lock()
+        self.files = {}
+        self.requests = []
+        self.connections = 0
+        self.branch_status = 200
+        self.commits_status = 201
+        self.stall = threading.Event()
+        self.release = threading.Event()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def api_base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v5"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.release.set()
+        self.shutdown()
+        self.server_close()
+
+    def routes(self, method=None):
+        """收到的请求路由（可按方法筛选）"""
+        return [route for m, route, _, _ in self.requests if method is None or m == method]
+
+    def config(self, **gitee):
+        """指向该替身的配置"""
+        values = {"owner": OWNER, "repo": REPO, "branch": BRANCH, "access_token": "token",
+                  "api_base": self.api_base, **gitee}
+        return DictConfig({"gitee": values})
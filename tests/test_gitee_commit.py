@@ -0,0 +1,102 @@
+import base64
+import os
+import tempfile
+import unittest
+
+from gitee_stub import GiteeStub, BRANCH, TREE_SHA
+import gitee_client
+from gitee_client import GiteeClient
+
+
+class GiteeCommitTest(unittest.TestCase):
+    """多个文件合并为一次提交（commits接口）及失败时改为逐个上传"""
+
+    def setUp(self):
+        self.stub = GiteeStub().start()
+        gitee_client._session = None
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.client = GiteeClient(self.stub.config())
+
+    def tearDown(self):
+        self.stub.stop()
+        self.temp_dir.cleanup()
+        gitee_client._session = None
+
+    def files(self, contents):
+        """写入本地文件，contents为 {仓库中的文件名: 内容}，返回 [(本地路径, 仓库中的文件名)]"""
+        files = []
+        for name, content in contents.items():
+            path = os.path.join(self.temp_dir.name, name.replace('/', '_'))
+            with open(path, 'wb') as f:
+                f.write(content)
+            files.append((path, name))
+        return files
+
+    def commit_actions(self):
+        bodies = [body for method, route, _, body in self.stub.requests if method == 'POST' and route == 'commits']
+        self.assertEqual(len(bodies), 1)
+        return bodies[0]
+
+    def test_single_commit_creates_updates_and_skips(self):
+        self.stub.files['same.html'] = b'same'
+        self.stub.files['old.html'] = b'old'
+        files = self.files({'same.html': b'same', 'old.html': b'new', 'acct/new.html': b'created'})
+
+        self.assertTrue(self.client.upload_files(files))
+
+        self.assertEqual(self.stub.routes(), [f'branches/{BRANCH}', f'git/trees/{TREE_SHA}', 'commits'])
+        self.assertEqual(self.stub.requests[1][2].get('recursive'), ['1'])
+        body = self.commit_actions()
+        self.assertEqual(body['branch'], BRANCH)
+        self.assertEqual(body['access_token'], 'token')
+        actions = {action['path']: action for action in body['actions']}
+        self.assertEqual(sorted(actions), ['acct/new.html', 'old.html'])
+        self.assertEqual(actions['old.html']['action'], 'update')
+        self.assertEqual(actions['acct/new.html']['action'], 'create')
+        for action in actions.values():
+            self.assertEqual(action['encoding'], 'base64')
+        self.assertEqual(base64.b64decode(actions['old.html']['content']), b'new')
+        self.assertEqual(self.stub.files['acct/new.html'], b'created')
+
+    def test_all_unchanged_skips_commit(self):
+        self.stub.files.update({'a.html': b'a', 'b.html': b'b'})
+        self.assertTrue(self.client.upload_files(self.files({'a.html': b'a', 'b.html': b'b'})))
+
+        self.assertEqual(self.stub.routes('POST'), [])
+        self.assertEqual(self.stub.routes('PUT'), [])
+
+    def test_falls_back_to_contents_when_branch_missing(self):
+        self.stub.branch_status = 404
+        self.assertTrue(self.client.upload_files(self.files({'a.html': b'a', 'b.html': b'b'})))
+
+        self.assertEqual(self.stub.routes('POST'), [])
+        self.assertEqual(self.stub.routes('PUT'), ['contents/a.html', 'contents/b.html'])
+        self.assertEqual(self.stub.files, {'a.html': b'a', 'b.html': b'b'})
+
+    def test_falls_back_to_contents_when_commit_fails(self):
+        self.stub.commits_status = 500
+        self.stub.files['a.html'] = b'old'
+        self.assertTrue(self.client.upload_files(self.files({'a.html': b'a', 'b.html': b'b'})))
+
+        self.assertEqual(self.stub.routes('POST'), ['commits'])
+        self.assertEqual(self.stub.routes('PUT'), ['contents/a.html', 'contents/b.html'])
+        self.assertEqual(self.stub.files, {'a.html': b'a', 'b.html': b'b'})
+
+    def test_timeout_does_not_fall_back(self):
+        self.stub.stall.set()
+        client = GiteeClient(self.stub.config(read_timeout='0.3'))
+        self.assertFalse(client.upload_files(self.files({'a.html': b'a', 'b.html': b'b'})))
+
+        # 网络卡住时不再逐个上传
+        self.assertEqual(self.stub.routes(), [f'branches/{BRANCH}'])
+
+    def test_batch_commit_disabled_uploads_each_file(self):
+        client = GiteeClient(self.stub.config(batch_commit='false'))
+        self.assertTrue(client.upload_files(self.files({'a.html': b'a', 'b.html': b'b'})))
+
+        self.assertNotIn(f'branches/{BRANCH}', self.stub.routes())
+        self.assertEqual(self.stub.routes('PUT'), ['contents/a.html', 'contents/b.html'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+
+from gitee_stub import GiteeStub
+import gitee_client
+from gitee_client import GiteeClient, git_blob_sha
+
+
+class GiteeUploadTest(unittest.TestCase):
+    """逐个文件上传（contents接口）"""
+
+    def setUp(self):
+        self.stub = GiteeStub().start()
+        # 每个测试使用新的会话，连接计数不受之前的测试影响
+        gitee_client._session = None
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.stub.stop()
+        self.temp_dir.cleanup()
+        gitee_client._session = None
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_creates_missing_file(self):
+        client = GiteeClient(self.stub.config())
+        self.assertTrue(client.upload_file(self.write('a.html', b'<p>new</p>'), 'a.html'))
+
+        self.assertEqual(self.stub.files['a.html'], b'<p>new</p>')
+        self.assertEqual(self.stub.routes(), ['contents/a.html', 'contents/a.html'])
+        put_body = self.stub.requests[-1][3]
+        self.assertNotIn('sha', put_body)
+        self.assertEqual(put_body['branch'], 'master')
+
+    def test_skips_unchanged_file(self):
+        self.stub.files['a.html'] = b'<p>same</p>'
+        client = GiteeClient(self.stub.config())
+        self.assertTrue(client.upload_file(self.write('a.html', b'<p>same</p>'), 'a.html'))
+
+        # 只查询sha，不上传
+        self.assertEqual(self.stub.routes('PUT'), [])
+        self.assertEqual(self.stub.routes('GET'), ['contents/a.html'])
+
+    def test_updates_changed_file_with_remote_sha(self):
+        self.stub.files['a.html'] = b'<p>old</p>'
+        client = GiteeClient(self.stub.config())
+        self.assertTrue(client.upload_file(self.write('a.html', b'<p>new</p>'), 'a.html'))
+
+        self.assertEqual(self.stub.files['a.html'], b'<p>new</p>')
+        put_body = self.stub.requests[-1][3]
+        self.assertEqual(put_body['sha'], git_blob_sha(b'<p>old</p>'))
+
+    def test_reuses_session_connection(self):
+        config = self.stub.config()
+        first = GiteeClient(config)
+        second = GiteeClient(config)
+        self.assertIs(first.session, second.session)
+
+        self.assertTrue(first.upload_file(self.write('a.html', b'a'), 'a.html'))
+        self.assertTrue(first.upload_file(self.write('b.html', b'b'), 'b.html'))
+        self.assertTrue(second.upload_file(self.write('c.html', b'c'), 'c.html'))
+
+        # 6个请求共用一个连接
+        self.assertEqual(len(self.stub.requests), 6)
+        self.assertEqual(self.stub.connections, 1)
+
+    def test_stalled_server_times_out(self):
+        self.stub.stall.set()
+        client = GiteeClient(self.stub.config(connect_timeout='1', read_timeout='0.3'))
+        self.assertEqual(client.timeout, (1.0, 0.3))
+
+        start = time.time()
+        self.assertFalse(client.upload_file(self.write('a.html', b'a'), 'a.html'))
+        self.assertLess(time.time() - start, 3)
+        self.assertEqual(self.stub.files, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
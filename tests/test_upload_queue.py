@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from gitee_stub import DictConfig, OWNER, REPO, BRANCH
+import upload_queue
+from gitee_client import GiteeClient
+from upload_queue import UploadQueue
+
+
+class FakeClock:
+    """代替 time 模块：sleep 直接推进时间"""
+
+    def __init__(self, now=1000000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class UploadQueueDrainTest(unittest.TestCase):
+    """drain 的指数退避、截止时间和过期任务"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.attempt_times = []
+        self.results = []
+        time_patch = mock.patch.object(upload_queue, 'time', self.clock)
+        upload_patch = mock.patch.object(GiteeClient, 'upload_files', autospec=True, side_effect=self.upload)
+        for patch in (time_patch, upload_patch):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def upload(self, client, files):
+        self.attempt_times.append(self.clock.now - self.start)
+        return self.results.pop(0) if self.results else False
+
+    def queue(self, **upload):
+        config = DictConfig({
+            "gitee": {"owner": OWNER, "repo": REPO, "branch": BRANCH, "access_token": "token"},
+            "upload": upload
+        })
+        queue = UploadQueue(os.path.join(self.temp_dir.name, 'upload_queue'), config)
+        file_path = os.path.join(self.temp_dir.name, 'report.html')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('<p>report</p>')
+        queue.enqueue([(file_path, 'baah_task_report.html')])
+        self.start = self.clock.now
+        return queue
+
+    def test_backoff_doubles_up_to_max(self):
+        queue = self.queue(initial_backoff=5, max_backoff=12)
+        self.results = [False, False, False, True]
+
+        self.assertTrue(queue.drain())
+
+        # 等待 5、10、12（上限）秒后重试
+        self.assertEqual(self.attempt_times, [0, 5, 15, 27])
+        self.assertEqual(queue.list_jobs(), [])
+        self.assertFalse(os.path.exists(os.path.join(queue.queue_folder, UploadQueue.LOCK_FILE_NAME)))
+
+    def test_deadline_leaves_job_for_next_run(self):
+        queue = self.queue(initial_backoff=25, worker_deadline_minutes=1)
+
+        self.assertFalse(queue.drain())
+
+        # 第三次重试在 75 秒，超过 60 秒的截止时间，不再等待
+        self.assertEqual(self.attempt_times, [0, 25])
+        self.assertEqual(self.clock.now - self.start, 25)
+        jobs = queue.list_jobs()
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0]['attempts'], 2)
+        self.assertFalse(os.path.exists(os.path.join(queue.queue_folder, UploadQueue.LOCK_FILE_NAME)))
+
+        # 下次运行时立即重试，不等待上次留下的退避时间
+        self.results = [True]
+        self.clock.sleep(1)
+        self.start = self.clock.now
+        self.assertTrue(queue.drain())
+        self.assertEqual(self.attempt_times[-1], 0)
+        self.assertEqual(queue.list_jobs(), [])
+
+    def test_expired_job_is_dropped(self):
+        queue = self.queue(max_age_days=7)
+        self.clock.sleep(8 * 86400)
+
+        self.assertTrue(queue.drain())
+
+        self.assertEqual(self.attempt_times, [])
+        self.assertEqual(queue.list_jobs(), [])
+
+
+class UploadQueueWorkerTest(unittest.TestCase):
+    """上传线程不阻止进程退出"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.temp_dir.cleanup()
+
+    def test_wait_is_capped_by_exit_grace(self):
+        config = DictConfig({
+            "gitee": {"owner": OWNER, "repo": REPO, "branch": BRANCH, "access_token": "token"},
+            "upload": {"exit_grace_seconds": 0.2}
+        })
+        queue = UploadQueue(os.path.join(self.temp_dir.name, 'upload_queue'), config)
+        file_path = os.path.join(self.temp_dir.name, 'report.html')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('<p>report</p>')
+        queue.enqueue([(file_path, 'baah_task_report.html')])
+
+        # 上传一直没有结果（如Gitee无响应）
+        with mock.patch.object(GiteeClient, 'upload_files', side_effect=lambda files: self.release.wait(10)):
+            thread = queue.start_worker()
+            self.assertTrue(thread.daemon)
+
+            start = time.time()
+            self.assertFalse(queue.wait_workers([thread]))
+            self.assertLess(time.time() - start, 2)
+            self.assertEqual(len(queue.list_jobs()), 1)
+
+            self.release.set()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+import os
+import json
+import atexit
+import time
+import uuid
+import threading
+from datetime import datetime
+from config_manager import ConfigManager
+from gitee_client import GiteeClient
+from report_state import ReportState
+
+
+class UploadQueue:
+    """报告上传队列（持久化在磁盘上的待上传任务）
+
+    每个上传任务保存为队列目录中的一个JSON文件（先写临时文件再替换），包含：
+        files: [[本地路径, 仓库中的文件名], ...]
+        account: 账号设置（多账号时使用该账号的Gitee配置，单账号为None）
+        report_key / fingerprint / summary: 上传成功后写入发布状态
+        attempts / next_attempt_at / last_error: 重试信息
+    任务由后台线程上传（上传到同一仓库的任务合并为一次提交），失败时按指数退避重试，直到成功或本次运行超过截止时间；
+    一次性命令结束后最多再等待 upload.exit_grace_seconds 秒，未完成的任务留在磁盘上，
+    下次运行 -check、-monitor 或 -send 时（或由常驻进程 -reportd）继续上传。
+    同一报告的新任务会替换队列中尚未上传的旧任务。
+    """
+
+    QUEUE_FOLDER_NAME = "upload_queue"
+    LOCK_FILE_NAME = ".lock"
+    DEFAULT_INITIAL_BACKOFF = 5
+    DEFAULT_MAX_BACKOFF = 300
+    DEFAULT_WORKER_DEADLINE = 30  # 分钟
+    DEFAULT_MAX_AGE_DAYS = 7
+    DEFAULT_EXIT_GRACE = 30  # 秒
+
+    def __init__(self, queue_folder=None, config=None):
+        self.config = config or ConfigManager()
+        self.queue_folder = queue_folder or self.get_queue_folder()
+
+    def get_queue_folder(self):
+        """上传任务目录：数据目录下的 upload_queue，每个待上传的任务一个JSON文件"""
+        return os.path.join(self.config.data_dir(), self.QUEUE_FOLDER_NAME)
+
+    def _job_path(self, job_id):
+        return os.path.join(self.queue_folder, job_id + ".json")
+
+    def _write_job(self, job):
+        """保存任务文件（先写临时文件再替换）"""
+        job_path = self._job_path(job['id'])
+        temp_path = job_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, job_path)
+
+    def _remove_job(self, job_id):
+        """删除任务文件，文件已不存在（被新任务替换）时返回False"""
+        try:
+            os.remove(self._job_path(job_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list_jobs(self):
+        """读取队列中的所有任务（按创建顺序）"""
+        if not os.path.isdir(self.queue_folder):
+            return []
+
+        jobs = []
+        with os.scandir(self.queue_folder) as it:
+            names = sorted(entry.name for entry in it if entry.name.endswith('.json') and entry.is_file())
+        for name in names:
+            try:
+                with open(os.path.join(self.queue_folder, name), 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+                if isinstance(job, dict) and job.get('files'):
+                    jobs.append(job)
+            except Exception as e:
+                print(f"读取上传任务 {name} 失败: {e}")
+        return jobs
+
+    def enqueue(self, files, account=None, report_key=None, fingerprint=None, summary=None):
+        """添加上传任务并返回任务ID，同一报告（report_key）尚未上传的旧任务会被替换"""
+        try:
+            os.makedirs(self.queue_folder, exist_ok=True)
+            if report_key:
+                for job in self.list_jobs():
+                    if job.get('report_key') == report_key:
+                        self._remove_job(job['id'])
+
+            now = time.time()
+            job = {
+                'id': f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:8]}",
+                'created_at': now,
+                'files': [[file_path, file_name] for file_path, file_name in files],
+                'account': account.settings if account is not None else None,
+                'report_key': report_key,
+                'fingerprint': fingerprint,
+                'summary': summary,
+                'attempts': 0,
+                'next_attempt_at': now,
+                'last_error': None
+            }
+            self._write_job(job)
+            print(f"已加入上传队列: {', '.join(file_name for _, file_name in job['files'])}")
+            return job['id']
+        except Exception as e:
+            print(f"添加上传任务失败: {e}")
+            return None
+
+    def _acquire_lock(self, deadline_seconds):
+        """获取队列锁，避免多个进程同时上传同一任务（超过截止时间未释放的锁视为失效）"""
+        lock_path = os.path.join(self.queue_folder, self.LOCK_FILE_NAME)
+        for _ in range(2):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode('ascii'))
+                os.close(fd)
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) < deadline_seconds + 60:
+                        return False
+                    os.remove(lock_path)
+                except OSError:
+                    return False
+        return False
+
+    def _release_lock(self):
+        try:
+            os.remove(os.path.join(self.queue_folder, self.LOCK_FILE_NAME))
+        except OSError:
+            pass
+
+    def get_job_config(self, job):
+        """任务使用的配置（多账号时为该账号的配置）"""
+        if job.get('account'):
+            # 延迟导入：accounts 依赖 report_generator
+            from accounts import AccountConfig
+            return AccountConfig(job['account'])
+        return self.config
+
+    def finish_job(self, job):
+        """上传成功：删除任务并记录发布状态"""
+        # 任务文件已被同一报告的新任务替换时，不用旧指纹覆盖发布状态
+        if self._remove_job(job['id']) and job.get('report_key') and job.get('fingerprint'):
+            ReportState().mark_published(job['report_key'], job['fingerprint'], job.get('summary'))
+
+    def retry_job(self, job):
+        """上传失败：按指数退避记录下次重试时间"""
+        initial_backoff = self.config.get_number('upload.initial_backoff', self.DEFAULT_INITIAL_BACKOFF)
+        max_backoff = self.config.get_number('upload.max_backoff', self.DEFAULT_MAX_BACKOFF)
+        job['attempts'] = job.get('attempts', 0) + 1
+        delay = min(initial_backoff * 2 ** (job['attempts'] - 1), max_backoff)
+        job['next_attempt_at'] = time.time() + delay
+        job['last_error'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S') + " 上传失败"
+        print(f"上传失败（第{job['attempts']}次），{delay:g}秒后重试")
+        if os.path.exists(self._job_path(job['id'])):
+            try:
+                self._write_job(job)
+            except Exception as e:
+                print(f"保存上传任务失败: {e}")
+
+    def process_jobs(self, jobs):
+        """上传一批任务：上传到同一仓库的任务合并为一次提交（各任务的文件按顺序排列，先上传数据文件）"""
+        groups = {}
+        for job in jobs:
+            missing = [file_path for file_path, _ in job['files'] if not os.path.exists(file_path)]
+            if missing:
+                print(f"待上传文件已不存在，放弃上传: {', '.join(missing)}")
+                self._remove_job(job['id'])
+                continue
+
+            client = GiteeClient(self.get_job_config(job))
+            key = (client.api_base, client.owner, client.repo, client.branch, client.access_token)
+            groups.setdefault(key, (client, []))[1].append(job)
+
+        for client, group in groups.values():
+            files = [file for job in group for file in job['files']]
+            if client.upload_files(files):
+                for job in group:
+                    self.finish_job(job)
+            else:
+                for job in group:
+                    self.retry_job(job)
+
+    def drain(self):
+        """上传队列中的所有任务，直到队列为空或超过截止时间，返回队列是否已清空
+
+        每次运行开始时所有任务立即尝试一次（上次运行留下的退避时间不再等待）。
+        """
+        deadline_seconds = self.config.get_number('upload.worker_deadline_minutes', self.DEFAULT_WORKER_DEADLINE) * 60
+        max_age = self.config.get_number('upload.max_age_days', self.DEFAULT_MAX_AGE_DAYS) * 86400
+        if not self.list_jobs():
+            return True
+        if not self._acquire_lock(deadline_seconds):
+            print("其他进程正在上传队列中的任务")
+            return False
+        # 进程退出时（守护线程随之结束）释放锁，下次运行可以立即继续上传
+        atexit.register(self._release_lock)
+
+        try:
+            start = time.time()
+            deadline = start + deadline_seconds
+            while True:
+                jobs = self.list_jobs()
+                if not jobs:
+                    print("上传队列已清空")
+                    return True
+
+                now = time.time()
+                due_jobs = []
+                for job in jobs:
+                    if now - job.get('created_at', now) > max_age:
+                        print(f"上传任务 {job['id']} 超过{max_age / 86400:g}天仍未成功，已放弃")
+                        self._remove_job(job['id'])
+                    elif job.get('last_tried_at', 0) < start or job.get('next_attempt_at', 0) <= now:
+                        job['last_tried_at'] = now
+                        due_jobs.append(job)
+                if due_jobs:
+                    self.process_jobs(due_jobs)
+
+                jobs = self.list_jobs()
+                if not jobs:
+                    print("上传队列已清空")
+                    return True
+
+                next_attempt = min(job.get('next_attempt_at', 0) for job in jobs)
+                if next_attempt >= deadline:
+                    print(f"上传未完成，{len(jobs)} 个任务留在队列中，下次运行时继续上传")
+                    return False
+                time.sleep(max(0.0, next_attempt - time.time()))
+        finally:
+            atexit.unregister(self._release_lock)
+            self._release_lock()
+
+    def start_worker(self):
+        """在后台线程中上传队列（守护线程：不阻止进程退出，见 wait_workers）
+
+        队列为空时不启动线程，返回线程对象或None
+        """
+        if not self.list_jobs():
+            return None
+        thread = threading.Thread(target=self._run_worker, name="upload-queue", daemon=True)
+        thread.start()
+        return thread
+
+    def wait_workers(self, threads):
+        """一次性命令结束前等待上传线程，最多 upload.exit_grace_seconds 秒；
+        未完成的任务留在队列中，由下次运行或常驻进程继续上传（重试不会让命令长时间不退出）
+        """
+        threads = [thread for thread in threads if thread is not None]
+        if not any(thread.is_alive() for thread in threads):
+            return True
+        grace = self.config.get_number('upload.exit_grace_seconds', self.DEFAULT_EXIT_GRACE)
+        end = time.time() + grace
+        for thread in threads:
+            thread.join(max(0.0, end - time.time()))
+        if any(thread.is_alive() for thread in threads):
+            print("上传未在等待时间内完成，未上传的任务留在队列中，下次运行时继续上传")
+            return False
+        return True
+
+    def _run_worker(self):
+        try:
+            self.drain()
+        except Exception as e:
+            print(f"上传队列处理出错: {e}")